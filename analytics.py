@@ -0,0 +1,152 @@
+import datetime
+import numpy as np
+import pandas as pd
+from postgrest.exceptions import APIError
+import loader
+import queries
+import rollups
+import schema
+import snapshot
+import terms
+
+# --- DASHBOARD AGGREGATES ---
+# The Dashboard only needs a handful of numbers and short series, so we ask
+# Postgres for them (see sql/001_dashboard_aggregates.sql) instead of pulling
+# every attendance/score row, limited to the selected term (sql/004_terms.sql).
+# aggregate_frames() computes the exact same payload in pandas; it is used
+# when the RPC is not deployed yet and in tests. With the snapshot behind it,
+# per-student numbers, class/category means and the daily series come from
+# the running totals in rollups.py, so they cost one row per student (or
+# school day) however many rows the term holds.
+
+RECENT_DAYS = 14
+
+
+def _frame(rows, columns):
+    # Empty API results have no columns, so give them the ones we expect
+    df = pd.DataFrame(rows)
+    for col in columns:
+        if col not in df.columns:
+            df[col] = pd.Series(dtype="object")
+    return df
+
+
+def _from_payload(payload):
+    daily = _frame(payload.get("daily") or [], ["date", "rate"])
+    daily["date"] = pd.to_datetime(daily["date"]).dt.date
+    classes = _frame(payload.get("classes") or [], ["name", "pct"])
+    categories = _frame(payload.get("categories") or [], ["category", "pct"])
+    students = _frame(payload.get("students") or [], ["student_id", "full_name", "class_id", "is_present", "pct"])
+    students[["is_present", "pct"]] = students[["is_present", "pct"]].astype(float)
+
+    recent = payload.get("recent_rate")
+    return {
+        "total_students": int(payload.get("total_students") or 0),
+        "boys": int(payload.get("boys") or 0),
+        "girls": int(payload.get("girls") or 0),
+        "recent_rate": float(recent) if recent is not None else None,
+        "daily": daily.set_index("date")["rate"].astype(float),
+        "students": students,
+        "class_means": classes.set_index("name")["pct"].astype(float),
+        "category_means": categories.set_index("category")["pct"].astype(float).sort_values(),
+    }
+
+
+def aggregate_frames(df_classes, df_students, df_scores, df_att, class_id=None, since=None, window=None,
+                     totals=None, daily=None):
+    # Only rows inside the (start, end) window count, like the RPC's p_start/p_end.
+    # totals: (attendance, scores) from rollups.totals() and daily: present /
+    # sessions per day from rollups.daily(), both for the same window; when
+    # not given they are summed from the rows here (typed first if raw).
+    df_students = schema.typed("students", _frame(df_students, schema.COLUMNS["students"]))
+    df_classes = _frame(df_classes, ["id", "name"])
+    if class_id is not None:
+        df_students = df_students[df_students["class_id"] == class_id]
+    if totals is None or daily is None:
+        df_att = terms.within(schema.typed("attendance", _frame(df_att, schema.COLUMNS["attendance"])), "attendance", window)
+    if totals is None:
+        df_scores = terms.within(schema.typed("scores", _frame(df_scores, schema.COLUMNS["scores"])), "scores", window)
+        totals = (rollups.summarize("attendance", df_att), rollups.summarize("scores", df_scores))
+    if daily is None:
+        df_att = df_att[df_att["student_id"].isin(df_students["id"])]
+        daily = pd.DataFrame({
+            "day": schema.day_numbers(df_att["date"]),
+            "present": df_att["is_present"].to_numpy(dtype=int),
+            "sessions": 1,
+        }).groupby("day").sum()
+    att_totals, score_totals = totals
+
+    gender = df_students["gender"].astype("string").str.lower()
+    recent = daily if since is None else daily[daily.index >= np.datetime64(since, "D")]
+
+    # Everything below is keyed on student codes, one row per student (and category)
+    codes = schema.student_codes(df_students["id"]).to_numpy()
+    att = att_totals.reindex(codes)
+    graded = score_totals.groupby(level="student")[["pct_sum", "pct_count"]].sum().reindex(codes)
+    students = df_students[["id", "full_name", "class_id"]].rename(columns={"id": "student_id"})
+    students = students.assign(
+        is_present=(att["present"] / att["sessions"] * 100).to_numpy(dtype=float),
+        pct=(graded["pct_sum"] / graded["pct_count"]).to_numpy(dtype=float),
+    ).reset_index(drop=True)
+
+    # Class and category means are pooled over assessments, not over students
+    student_of = score_totals.index.get_level_values("student")
+    scoped = score_totals[student_of.isin(codes)]
+    class_names = pd.Series(
+        df_students["class_id"].astype(str).map(df_classes.set_index("id")["name"]).to_numpy(), index=codes,
+    )
+    by_class = scoped.groupby(class_names.reindex(scoped.index.get_level_values("student")).to_numpy())[["pct_sum", "pct_count"]].sum()
+    by_category = scoped.groupby(level="category")[["pct_sum", "pct_count"]].sum()
+    taken = int(recent["sessions"].sum())
+
+    return {
+        "total_students": len(df_students),
+        "boys": int((gender == "boy").sum()),
+        "girls": int((gender == "girl").sum()),
+        "recent_rate": float(recent["present"].sum() / taken * 100) if taken else None,
+        "daily": pd.Series(
+            (daily["present"] / daily["sessions"] * 100).to_numpy(dtype=float),
+            index=pd.Index(pd.DatetimeIndex(daily.index).date, name="date"),
+        ),
+        "students": students,
+        "class_means": (by_class["pct_sum"] / by_class["pct_count"]).astype(float).rename_axis("name"),
+        "category_means": (by_category["pct_sum"] / by_category["pct_count"]).astype(float).sort_values(),
+    }
+
+
+def dashboard_aggregates(conn, class_id=None, today=None, window=None):
+    # window: (start, end) dates from terms.py; None means all time. The recent
+    # rate covers the last RECENT_DAYS days of the window.
+    today = today or datetime.date.today()
+    if window is None:
+        since = today - datetime.timedelta(days=RECENT_DAYS)
+    else:
+        since = terms.recent_since(window, RECENT_DAYS, today)
+    try:
+        res = conn.client.rpc("dashboard_aggregates", {
+            "p_class_id": class_id,
+            "p_since": str(since),
+            "p_start": str(window[0]) if window else None,
+            "p_end": str(window[1]) if window else None,
+        }).execute()
+        return _from_payload(res.data or {})
+    except APIError as e:
+        if e.code != "PGRST202":
+            raise
+        # RPC not installed on this project yet (PGRST202): aggregate the local snapshot
+        frames = queries.run_parallel({
+            "classes": lambda: loader.fetch_frame(conn, "classes", "id, name"),
+            "students": lambda: loader.fetch_frame(conn, "students", "id, full_name, class_id, gender"),
+            "scores": lambda: snapshot.load(conn, "scores"),
+            "attendance": lambda: snapshot.load(conn, "attendance"),
+        })
+        # Per-student, class and daily numbers come from the rollups the
+        # snapshot loads just brought up to date
+        rollups.set_classes(schema.typed("students", frames["students"]))
+        totals = (rollups.totals("attendance", window), rollups.totals("scores", window))
+        return aggregate_frames(
+            frames["classes"], frames["students"], frames["scores"], frames["attendance"],
+            class_id=class_id, since=since, window=window,
+            totals=None if any(t is None for t in totals) else totals,
+            daily=rollups.daily(window, class_id),
+        )
@@ -0,0 +1,187 @@
+import streamlit as st
+import pandas as pd
+from postgrest.exceptions import APIError
+import attendance_index
+import common
+import metrics
+from common import get_attendance_indexes, get_classes, get_dashboard, show_attendance_calendar
+
+# --- PAGE: DASHBOARD ---
+recorder = common.recorder()
+RISK_LIMITS = common.risk_limits()
+
+st.header("Academic Overview")
+
+classes_res = get_classes()
+if not classes_res.data:
+    st.warning("Welcome! Please go to 'First Time Setup' to add your first class.")
+else:
+    df_classes = pd.DataFrame(classes_res.data)
+    # NEW: Allow the teacher to pick one class or see everything
+    class_list = {c['name']: c['id'] for c in classes_res.data}
+    view_filter = st.selectbox("Filter By Class", ["All Classes"] + list(class_list.keys()))
+
+    common.sync_snapshot()
+    with st.spinner("Analyzing classroom data..."):
+        # Only the pre-aggregated numbers come back, filtered by class on the server
+        target_cid = class_list[view_filter] if view_filter != "All Classes" else None
+        # The local fallback only stands in for a missing function; any
+        # other server error is shown rather than papered over
+        try:
+            agg = get_dashboard(target_cid)
+        except APIError as e:
+            st.error(f"Could not load the dashboard: {e.message}")
+            st.stop()
+        df_students = agg["students"]
+
+    # STEP 2: CALCULATE METRICS
+    with recorder.span("pandas", "dashboard metrics"):
+        total_classes = len(df_classes)
+        total_students = agg["total_students"]
+
+        # Gender Logic
+        if total_students:
+            gender_text = f"👦 {agg['boys']} | 👧 {agg['girls']}"
+        else:
+            gender_text = "No Data"
+
+        # Weekly Attendance Logic
+        att_display = "No logs"
+        if agg["recent_rate"] is not None:
+            att_display = f"{agg['recent_rate']:.1f}%"
+
+        # Red Flag Logic
+        # Students with both attendance and grades on record, classified in one pass
+        combined = metrics.classify(df_students.dropna(subset=["is_present", "pct"]), RISK_LIMITS)
+        grade_means = df_students["pct"].dropna()
+        red_flags = int((combined['Status'] == metrics.URGENT).sum())
+
+    # STEP 3: DISPLAY METRIC GRID
+    st.markdown("""
+        <style>
+        .metric-container {
+            background-color: white; padding: 15px; border-radius: 12px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.05); border-bottom: 3px solid #4CAF50;
+            text-align: center; margin-bottom: 10px;
+        }
+        .m-label { color: #64748b; font-size: 0.8em; font-weight: bold; text-transform: uppercase; }
+        .m-value { color: #1e293b; font-size: 1.4em; font-weight: 800; }
+        </style>
+    """, unsafe_allow_html=True)
+
+    m_col1, m_col2, m_col3, m_col4 = st.columns(4)
+    with m_col1: st.markdown(f'<div class="metric-container"><div class="m-label">Total Enrollment</div><div class="m-value">{total_students}</div></div>', unsafe_allow_html=True)
+    with m_col2: st.markdown(f'<div class="metric-container"><div class="m-label">Gender Balance</div><div class="m-value">{gender_text}</div></div>', unsafe_allow_html=True)
+    with m_col3: st.markdown(f'<div class="metric-container"><div class="m-label">Subject Engagement</div><div class="m-value">{att_display}</div></div>', unsafe_allow_html=True)
+    with m_col4: 
+        f_color = "#ff4b4b" if red_flags > 0 else "#1e293b"
+        st.markdown(f'<div class="metric-container"><div class="m-label">Priority Support</div><div class="m-value" style="color: {f_color};">{red_flags} Students</div></div>', unsafe_allow_html=True)
+
+    s_col1, s_col2, s_col3 = st.columns(3)
+    s_col1.metric("Active Classes", total_classes)
+    s_col2.metric("System Status", "Online", "Ready")
+    s_col3.metric("Current Term", common.term_name())
+    st.divider()
+
+    # STEP 4: DISPLAY TABS
+    with recorder.span("render", "dashboard tabs"):
+        if total_students == 0:
+            st.info("Classes are ready. Now upload students in 'First Time Setup' to see analytics.")
+        else:
+            tabs = st.tabs(["Engagement Pulse", "At-Risk/Intervention", "Comparative Class Analytics", "Assessment Analysis", "Semester Outcomes", "Attendance Patterns"])
+
+            with tabs[0]:
+                if not agg["daily"].empty:
+                    st.line_chart(agg["daily"])
+                else: st.info("No attendance data recorded.")
+
+            with tabs[1]:
+                if not combined.empty:
+                    st.subheader("Intervention Priority List")
+
+                    # 1. Logic for Verdicts
+                    # Grades and attendance side by side find the 'hidden' struggling students
+                    # (Status comes from metrics.classify above, same verdicts as the red-flag count)
+                    roster = combined
+
+                    # Names already come with the summary; filter out the 'On Track' students for a clean list
+                    priority_list = roster[roster['Status'] != metrics.ON_TRACK][['full_name', 'pct', 'is_present', 'Status']]
+
+                    if not priority_list.empty:
+                        st.dataframe(
+                            priority_list.sort_values("pct"), 
+                            column_config={
+                                "full_name": "Student Name",
+                                "pct": st.column_config.NumberColumn("Avg Grade", format="%.1f%%"),
+                                "is_present": st.column_config.NumberColumn("Attendance", format="%.1f%%"),
+                                "Status": "Required Action"
+                            },
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                    else:
+                        st.success("All students are currently meeting attendance and academic benchmarks.")
+
+                    st.markdown("---")
+
+                    # 2. Visual Correlation Chart
+                    st.subheader("The 'Attendance vs. Grades' Link")
+                    st.caption("Dots in the bottom-left corner are your highest priority students.")
+
+                    # Plotting the visual trend
+                    st.scatter_chart(
+                        roster, 
+                        x="is_present", 
+                        y="pct", 
+                        color="Status", # Colors the dots by their risk category!
+                        size=20
+                    )
+                else:
+                    st.info("More data needed to generate intervention analytics. Record at least 3 sessions of attendance and scores.")
+
+            with tabs[2]:
+                if not agg["class_means"].empty:
+                    st.bar_chart(agg["class_means"])
+
+            with tabs[3]:
+                if not agg["category_means"].empty:
+                    st.bar_chart(agg["category_means"], horizontal=True)
+
+            with tabs[4]:
+                if not grade_means.empty:
+                    # Same bands as the Student Profile's Academic Standing
+                    st.bar_chart(metrics.standing_counts(grade_means, RISK_LIMITS))
+
+            with tabs[5]:
+                # Streaks and windows come from the per-class attendance bitmaps
+                indexes = get_attendance_indexes([target_cid] if target_cid else list(class_list.values()))
+                patterns = pd.concat([ix.summary(RISK_LIMITS) for ix in indexes], ignore_index=True)
+                patterns = patterns.merge(df_students[["student_id", "full_name"]], on="student_id")
+                chronic = patterns[patterns["chronic"]].sort_values(["current_streak", "missed_pct"], ascending=False)
+
+                st.subheader("Chronic Absence")
+                st.caption(
+                    f"Absent {int(RISK_LIMITS['absence_streak'])}+ school days in a row, or missed "
+                    f"{RISK_LIMITS['absence_window_pct']:.0f}% of the last {int(RISK_LIMITS['absence_window_days'])} school days."
+                )
+                if not chronic.empty:
+                    st.dataframe(
+                        chronic[["full_name", "current_streak", "longest_streak", "missed_pct"]],
+                        column_config={
+                            "full_name": "Student Name",
+                            "current_streak": st.column_config.NumberColumn("Current Streak", format="%d days"),
+                            "longest_streak": st.column_config.NumberColumn("Longest Streak", format="%d days"),
+                            "missed_pct": st.column_config.NumberColumn("Missed Recently", format="%.1f%%"),
+                        },
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                else:
+                    st.success("No student currently meets the chronic absence criteria.")
+
+                st.subheader("Attendance Calendar")
+                counts = pd.concat([ix.daily_counts() for ix in indexes]).groupby(level=0).sum()
+                if not counts.empty:
+                    show_attendance_calendar(attendance_index.daily_rate(counts))
+                else:
+                    st.info("No attendance data recorded.")
@@ -0,0 +1,52 @@
+import streamlit as st
+import common
+import reports
+from common import get_class_attendance, get_class_scores, get_classes, get_roster_details, run_queries
+
+# --- PAGE: EXPORT REPORTS ---
+RISK_LIMITS = common.risk_limits()
+
+st.header("Term Reports")
+st.caption("A report card per student (HTML, prints to PDF) plus a class summary spreadsheet, in one ZIP.")
+
+classes_res = get_classes()
+if not classes_res.data:
+    st.warning("Please add a class in Setup first.")
+else:
+    class_map = {c['name']: c['id'] for c in classes_res.data}
+    export_class = st.selectbox("Class", list(class_map.keys()))
+    class_id = class_map[export_class]
+    # The window picked in the sidebar
+    term = common.term_name()
+    start, end = common.term_window()
+    st.info(f"Term: **{term}** ({start:%d %b %Y} – {end:%d %b %Y}). Change it in the sidebar.")
+
+    export_key = (class_id, start, end)
+    if st.button("Generate Reports"):
+        with st.spinner("Loading class records..."):
+            loaded = run_queries({
+                "class_roster": lambda: get_roster_details(class_id),
+                "class_scores": lambda: get_class_scores(class_id, start, end),
+                "class_attendance": lambda: get_class_attendance(class_id, start, end),
+            })
+            students = reports.payloads(
+                loaded["class_roster"].data, loaded["class_scores"], loaded["class_attendance"]
+            )
+
+        if not students:
+            st.info("No students enrolled in this class.")
+        else:
+            bar = st.progress(0.0, text="Rendering report cards...")
+            def report(done, total):
+                bar.progress(done / total, text=f"Rendering report cards... {done} of {total}")
+            archive = reports.export_zip(students, term, export_class, RISK_LIMITS, on_progress=report)
+            bar.empty()
+            st.session_state.report_export = {"key": export_key, "name": f"{export_class} {term}", "zip": archive}
+
+    # Kept until another class or term is picked, so the download survives reruns
+    export = st.session_state.get("report_export")
+    if export and export["key"] == export_key:
+        st.success(f"Reports ready: {export['name']}.")
+        st.download_button(
+            "Download ZIP", export["zip"], f"{export['name']}.zip".replace("/", "-"), "application/zip"
+        )
@@ -0,0 +1,112 @@
+import streamlit as st
+import pandas as pd
+import cache
+import common
+import writes
+from common import editor_source, get_classes, get_roster_details, student_picker
+
+# --- PAGE: MANAGE RECORDS ---
+conn = common.connection()
+
+st.header("Classroom Administration")
+
+classes_res = get_classes()
+if not classes_res.data:
+    st.warning("No classes found. Create one in 'First Time Setup'.")
+else:
+    # 1. Select Class to Manage
+    class_map = {c['name']: c['id'] for c in classes_res.data}
+    manage_class_name = st.selectbox("Select Class to Manage", list(class_map.keys()))
+    manage_class_id = class_map[manage_class_name]
+
+    # 2. Fetch Students
+    # Kept in session state until the class changes, so editing cells reruns
+    # only the roster fragment below
+    sheet = editor_source(
+        "sheet:roster", manage_class_id,
+        lambda: {"roster": pd.DataFrame(get_roster_details(manage_class_id).data)},
+    )
+    df_manage = sheet["roster"]
+
+    if df_manage.empty:
+        st.info("This class has no students.")
+        if st.button("Delete Empty Class"):
+            conn.table("classes").delete().eq("id", manage_class_id).execute()
+            cache.invalidate("classes")
+            st.success("Class deleted.")
+            st.rerun()
+    else:
+        st.subheader("Student Roster")
+        st.caption("Double-click a cell to edit. Click 'Save Changes' to update the database.")
+
+        @st.fragment
+        def roster_sheet():
+            sheet = st.session_state["sheet:roster"]
+            df_manage = sheet["roster"]
+            sheet_class_id = sheet["key"]
+
+            # 3. Data Editor for Editing Names/Gender
+            edited_df = st.data_editor(
+                df_manage[['id', 'full_name', 'gender']],
+                column_config={
+                    "id": None, # Hide ID
+                    "full_name": st.column_config.TextColumn("Full Name", required=True),
+                    "gender": st.column_config.SelectboxColumn("Gender", options=["Boy", "Girl", "Not Specified"])
+                },
+                use_container_width=True,
+                hide_index=True,
+                key=f"roster_editor:{sheet_class_id}"
+            )
+
+            # SAVE EDITS BUTTON
+            if st.button("Save Changes to Roster"):
+                with st.spinner("Updating records..."):
+                    # Only rows the teacher actually edited go out, in one bulk upsert
+                    try:
+                        changed = writes.save_roster_changes(conn, sheet_class_id, df_manage, edited_df)
+                    except Exception as e:
+                        st.error(f"Roster not saved, no changes were kept: {e}")
+                    else:
+                        if changed:
+                            cache.invalidate("students", sheet_class_id)
+                            del st.session_state["sheet:roster"]
+                            st.success(f"Roster updated successfully! {changed} student(s) changed.")
+                            st.rerun()
+                        else:
+                            st.info("No changes to save.")
+
+        roster_sheet()
+
+        st.divider()
+
+        # 4. DELETION SECTION (The "Dangerous" Zone)
+        st.subheader("Danger Zone")
+        st.warning("Deleting a student will permanently remove all their attendance and score history.")
+
+        # Picked by id through the same search as the Student Profile, so
+        # students sharing a name can still be told apart
+        delete_whole_class = st.checkbox(f"Select the entire class ({len(df_manage)} students)")
+        if delete_whole_class:
+            delete_ids = df_manage['id'].tolist()
+        else:
+            delete_ids = student_picker("Select Students to Permanently Remove", f"delete_students:{manage_class_id}", manage_class_id, multiple=True)
+
+        # Use a Popover to confirm deletion (to prevent accidental clicks)
+        if delete_ids:
+            with st.popover(f"Delete {len(delete_ids)} Student(s)"):
+                st.write(f"Are you absolutely sure you want to delete **{len(delete_ids)} student(s)** from **{manage_class_name}**?")
+                st.write("This action cannot be undone.")
+                if st.button("Confirm Permanent Deletion"):
+                    # One transactional call removes the students and all their history
+                    try:
+                        removed = writes.delete_students(
+                            conn, delete_ids, class_id=manage_class_id if delete_whole_class else None
+                        )
+                    except Exception as e:
+                        st.error(f"Deletion failed: {e}")
+                    else:
+                        for table in ("students", "attendance", "scores"):
+                            cache.invalidate(table, manage_class_id)
+                        del st.session_state["sheet:roster"]
+                        st.error(f"{removed} student record(s) have been erased.")
+                        st.rerun()
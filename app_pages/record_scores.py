@@ -0,0 +1,202 @@
+import streamlit as st
+import datetime
+import pandas as pd
+import gradebook
+import journal
+from common import editor_source, get_class_scores, get_classes, get_scores_for_assessment, get_students, pending_for, run_queries
+
+# --- PAGE: SCORES ---
+CATEGORIES = ["Quiz", "Exercise", "Midterm", "Assignment", "Presentation", "Group Work", "Class Participation"]
+
+st.header("Assessment")
+classes_data = get_classes()
+
+if not classes_data.data:
+    st.warning("Please add a class in Setup first.")
+else:
+    mode = st.radio("Entry Mode", ["Single Assessment", "Gradebook"], horizontal=True)
+    class_map = {c['name']: c['id'] for c in classes_data.data}
+
+    if mode == "Gradebook":
+        # Students x assessments over a date range, prefilled from one range query
+        g_col1, g_col2, g_col3 = st.columns([2, 1, 1])
+        gradebook_class = g_col1.selectbox("Select Target Class", list(class_map.keys()), key="gradebook_class")
+        today = datetime.date.today()
+        range_start = g_col2.date_input("From", today - datetime.timedelta(days=today.weekday()))
+        range_end = g_col3.date_input("To", today)
+        class_id = class_map[gradebook_class]
+
+        def load_gradebook():
+            loaded = run_queries({
+                "class_roster": lambda: get_students(class_id),
+                "class_scores": lambda: get_class_scores(class_id, range_start, range_end),
+            })
+            roster = loaded["class_roster"].data
+            df_scores = loaded["class_scores"][["student_id", "category", "score_value", "max_score", "recorded_at"]]
+            # Unsynced saves from the journal win over what the server has
+            roster_ids = {str(s['id']) for s in roster}
+            pending = [
+                r for r in pending_for("scores")
+                if str(r['student_id']) in roster_ids and str(range_start) <= r['recorded_at'] <= str(range_end)
+            ]
+            if pending:
+                df_scores = pd.concat([df_scores, pd.DataFrame(pending)[df_scores.columns]], ignore_index=True)
+            return {"roster": roster, "scores": df_scores, "extra": []}
+
+        sheet = editor_source("sheet:gradebook", (class_id, range_start, range_end), load_gradebook)
+
+        if not sheet["roster"]:
+            st.info("No students enrolled in this class.")
+        else:
+            with st.popover("➕ Add Assessment Column"):
+                new_day = st.date_input("Assessment Date", range_end, min_value=range_start, max_value=range_end, key="gradebook_new_day")
+                new_category = st.selectbox("Category", CATEGORIES, key="gradebook_new_category")
+                new_max = st.number_input("Max Points", min_value=1.0, value=10.0, step=1.0, key="gradebook_new_max")
+                if st.button("Add Column"):
+                    sheet["extra"].append({"recorded_at": str(new_day), "category": new_category, "max_score": new_max})
+
+            @st.fragment
+            def gradebook_sheet():
+                sheet = st.session_state["sheet:gradebook"]
+                sheet_class_id, sheet_start, sheet_end = sheet["key"]
+                columns = gradebook.assessments(sheet["scores"], sheet["extra"])
+                if not columns:
+                    st.info("No assessments recorded in this range yet. Add a column to start.")
+                    return
+
+                original = gradebook.matrix(sheet["roster"], sheet["scores"], columns)
+                column_config = {"ID": None}
+                for name, column in columns.items():
+                    column_config[name] = st.column_config.NumberColumn(
+                        label=f"{name} (/{column['max_score']:g})",
+                        min_value=0.0,
+                        max_value=column['max_score'],
+                        format="%.1f"
+                    )
+                edited_df = st.data_editor(
+                    original,
+                    column_config=column_config,
+                    disabled=["Student Name"],
+                    hide_index=True,
+                    use_container_width=True,
+                    key=f"gradebook_editor:{sheet_class_id}:{sheet_start}:{sheet_end}"
+                )
+
+                if st.button("Save Gradebook"):
+                    with st.spinner("Processing results..."):
+                        # Only filled-in or changed cells, each with its column's max points,
+                        # go out together on the (student_id, category, recorded_at) key
+                        score_records = gradebook.changes(original, edited_df, columns)
+                        if score_records:
+                            journal.submit("scores", score_records, sheet_class_id)
+                            # The sheet now matches what was saved
+                            sheet["scores"] = pd.concat([sheet["scores"], pd.DataFrame(score_records)], ignore_index=True)
+                            st.success(f"{len(score_records)} score(s) saved. Syncing in the background.")
+                        else:
+                            st.info("No changed cells to save.")
+
+            gradebook_sheet()
+    else:
+        # 1. Inputs for the Assessment
+        col1, col2, col3 = st.columns([2, 2, 1])
+        score_date = col1.date_input("Assessment Date", datetime.date.today())
+        category = col2.selectbox("Category", CATEGORIES)
+        max_pts = col3.number_input("Max Points", min_value=1.0, value=10.0, step=1.0)
+
+        selected_class = st.selectbox("Select Target Class", list(class_map.keys()))
+        class_id = class_map[selected_class]
+
+        # 2. Fetch Students & Existing Scores (SMART CLASS-SPECIFIC CHECK, in parallel)
+        # Only when the class, date or category changes; typing scores reruns just
+        # the score sheet fragment below
+        def load_sheet():
+            loaded = run_queries({
+                "class_roster": lambda: get_students(class_id),
+                "existing_scores": lambda: get_scores_for_assessment(class_id, score_date, category),
+            })
+            students_res = loaded["class_roster"]
+            # THE FIX: Search specifically for THIS class, date, and category
+            existing_scores_res = loaded["existing_scores"]
+
+            # Create a history map: {student_id: score_value}
+            history_map = {str(rec['student_id']): rec['score_value'] for rec in existing_scores_res.data}
+            # Unsynced saves from the journal win over what the server has
+            for rec in pending_for("scores", recorded_at=score_date, category=category):
+                history_map[str(rec['student_id'])] = rec['score_value']
+
+            # Prepare data for the editor
+            display_data = []
+            for s in students_res.data:
+                s_id = str(s['id'])
+                current_score = history_map.get(s_id, 0.0)
+                display_data.append({
+                    "ID": s['id'], 
+                    "Student Name": s['full_name'], 
+                    "Points Earned": float(current_score)
+                })
+
+            return {"roster": pd.DataFrame(display_data), "existing": bool(existing_scores_res.data)}
+
+        sheet = editor_source("sheet:scores", (class_id, score_date, category), load_sheet)
+        # Max points only changes the column limits, so it doesn't reload the sheet
+        sheet["max_pts"] = max_pts
+
+        if sheet["roster"].empty:
+            st.info("No students enrolled in this class.")
+        else:
+            # --- THE SMART WARNING ---
+            if sheet["existing"]:
+                st.info(f"💡 Records for **{category}** on **{score_date}** already exist for **{selected_class}**. Saving will update these scores.")
+
+            # UI Feedback for History
+            if sheet["existing"]:
+                st.info(f"Found existing '{category}' records for {score_date}. You can edit and save to update them.")
+
+            st.write(f"### Score Sheet: {category} (Out of {max_pts})")
+
+            @st.fragment
+            def score_sheet():
+                sheet = st.session_state["sheet:scores"]
+                sheet_class_id, sheet_date, sheet_category = sheet["key"]
+                max_pts = sheet["max_pts"]
+
+                # 3. Data Editor
+                edited_df = st.data_editor(
+                    sheet["roster"],
+                    column_config={
+                        "ID": None, # Hide ID
+                        "Points Earned": st.column_config.NumberColumn(
+                            label=f"Points / {max_pts}", 
+                            min_value=0.0, 
+                            max_value=float(max_pts), 
+                            format="%.1f"
+                        )
+                    },
+                    disabled=["Student Name"],
+                    hide_index=True,
+                    use_container_width=True,
+                    key=f"score_editor:{sheet_class_id}:{sheet_date}:{sheet_category}"
+                )
+
+                # 4. Save Logic (Using Upsert)
+                if st.button("Finalize & Save Scores"):
+                    with st.spinner("Processing results..."):
+                        score_records = []
+                        for _, row in edited_df.iterrows():
+                            score_records.append({
+                                "student_id": row['ID'],
+                                "category": sheet_category,
+                                "score_value": row['Points Earned'],
+                                "max_score": max_pts,
+                                "recorded_at": str(sheet_date)
+                            })
+
+                        try:
+                            # Journaled locally, then upserted in the background. The conflict
+                            # happens if student, category, and date are all the same
+                            journal.submit("scores", score_records, sheet_class_id)
+                            st.success(f"Scores finalized. Class Average: {edited_df['Points Earned'].mean():.1f}/{max_pts}. Syncing in the background.")
+                        except Exception as e:
+                            st.error(f"Error saving data: {e}")
+
+            score_sheet()
@@ -0,0 +1,103 @@
+import streamlit as st
+from postgrest.exceptions import APIError
+import cache
+import common
+import importer
+import photos
+from common import get_classes
+
+# --- PAGE: SETUP ---
+conn = common.connection()
+
+st.header("1️⃣ Create a Class")
+with st.form("add_class_form"):
+    new_class_name = st.text_input("Class Name")
+    if st.form_submit_button("Create Class"):
+        conn.table("classes").insert({"name": new_class_name}).execute()
+        cache.invalidate("classes")
+        st.success("Class Created!")
+        st.rerun()
+
+st.divider()
+st.header("2️⃣ Bulk Upload Students")
+classes_data = get_classes()
+if classes_data.data:
+    class_map = {c['name']: c['id'] for c in classes_data.data}
+    target_class = st.selectbox("Upload to which class?", list(class_map.keys()))
+    uploaded_file = st.file_uploader("Upload CSV or Excel", type=['csv', 'xlsx'])
+
+    if uploaded_file:
+        # Only the header is read up front; the rows are streamed during the import
+        if 'name' not in importer.read_header(uploaded_file):
+            st.error("Column 'name' not found.")
+        else:
+            if st.button("Import All Students"):
+                target_class_id = class_map[target_class]
+                bar = st.progress(0.0, text="Importing students...")
+                def report(imported, fraction):
+                    bar.progress(fraction, text=f"Importing students... {imported:,} saved")
+                try:
+                    imported, rejected = importer.import_students(conn, uploaded_file, target_class_id, on_progress=report)
+                except Exception as e:
+                    st.error(f"Error: {e}")
+                else:
+                    cache.invalidate("students", target_class_id)
+                    bar.empty()
+                    st.success(f"Successfully imported {imported} students!")
+                    if not rejected.empty:
+                        st.warning(f"{len(rejected)} row(s) were skipped. See the report below.")
+                        st.dataframe(rejected, use_container_width=True, hide_index=True)
+                        st.download_button("Download Rejection Report", rejected.to_csv(index=False), "rejected_rows.csv", "text/csv")
+
+st.divider()
+st.header("3️⃣ School Terms")
+st.caption("Dashboards and student profiles show one term at a time, picked in the sidebar. Until terms are added here, calendar quarters are used.")
+with st.form("add_term_form"):
+    t_col1, t_col2, t_col3 = st.columns([2, 1, 1])
+    new_term_name = t_col1.text_input("Term Name", placeholder="e.g. 2026 Term 1")
+    new_term_start = t_col2.date_input("Starts")
+    new_term_end = t_col3.date_input("Ends")
+    if st.form_submit_button("Add Term"):
+        if not new_term_name or new_term_end < new_term_start:
+            st.error("Give the term a name and an end date on or after its start.")
+        else:
+            conn.table("terms").insert({
+                "name": new_term_name, "start_date": str(new_term_start), "end_date": str(new_term_end),
+            }).execute()
+            cache.invalidate("terms")
+            st.success("Term added!")
+            st.rerun()
+
+st.divider()
+st.header("4️⃣ Student Photos")
+st.caption("New portraits are resized and compressed on upload. Photos uploaded before that are converted here, a few at a time.")
+if st.button("Optimize Existing Photos"):
+    bar = st.progress(0.0, text="Converting photos...")
+    def report(done, total):
+        bar.progress(done / total, text=f"Converting photos... {done:,} of {total:,}")
+    try:
+        converted, failures = photos.backfill(conn, on_progress=report)
+    except APIError as e:
+        # 42703: no photo_avatar_url column, sql/006_student_photos.sql not run yet
+        bar.empty()
+        hint = " Run sql/006_student_photos.sql in the Supabase SQL editor first." if e.code == "42703" else ""
+        st.error(f"Photos not converted: {e.message}.{hint}")
+    else:
+        cache.invalidate("students")
+        bar.empty()
+        if converted or not failures:
+            st.success(f"{converted} photo(s) converted.")
+        if failures:
+            st.warning(f"{len(failures)} photo(s) could not be converted.")
+            st.dataframe(
+                [{"Student ID": sid, "Reason": reason} for sid, reason in failures.items()],
+                use_container_width=True, hide_index=True
+            )
+
+st.divider()
+st.header("5️⃣ Student Rollups")
+st.caption("Dashboard figures come from running totals per student, updated as attendance and scores sync. Rebuild them if they ever look out of step with the records.")
+if st.button("Rebuild Student Rollups"):
+    with st.spinner("Recounting attendance and scores..."):
+        common.rebuild_rollups()
+    st.success("Student rollups rebuilt.")
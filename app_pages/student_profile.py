@@ -0,0 +1,183 @@
+import streamlit as st
+import pandas as pd
+import common
+import metrics
+from common import get_attendance_indexes, get_classes, get_student, get_student_history, get_student_totals, run_queries, show_attendance_calendar, student_picker, upload_student_photo
+
+# --- PAGE: STUDENT PROFILE ---
+recorder = common.recorder()
+RISK_LIMITS = common.risk_limits()
+
+# 1. Pick a student
+# Only the top name matches come back from the server; the full row is
+# fetched once a student is picked
+class_list = {c['name']: c['id'] for c in get_classes().data}
+view_filter = st.selectbox("Filter By Class", ["All Classes"] + list(class_list.keys()))
+target_id = student_picker("📂 Access Student Portfolio", "profile_student", class_list.get(view_filter))
+student_row = get_student(target_id) if target_id is not None else None
+
+if student_row is None:
+    st.info("No records found in the Student Directory.")
+else:
+    # Lock in variables
+    target_gender = student_row['gender']
+    # The 300px avatar where there is one; photos from before the pipeline
+    # (see photos.py) only have photo_url until they are backfilled
+    target_photo = student_row.get('photo_avatar_url') or student_row.get('photo_url') or None
+
+    # --- IDENTITY CARD ---
+    id_col1, id_col2 = st.columns([1, 4])
+
+    with id_col1:
+        if target_photo:
+            # Photo URLs are content-addressed, so the browser/CDN copy is always current
+            st.markdown(f"""
+                <div style="display: flex; justify-content: center; margin-bottom: 10px;">
+                    <img src="{target_photo}" style="
+                        width: 150px; height: 150px;
+                        border-radius: 50%; object-fit: cover; 
+                        border: 3px solid #4CAF50; box-shadow: 0 4px 10px rgba(0,0,0,0.1);
+                    ">
+                </div>
+            """, unsafe_allow_html=True)
+        else:
+            initials = "".join([n[0] for n in student_row['full_name'].split()[:2]]).upper()
+            st.markdown(f"""
+                <div style="display: flex; justify-content: center; margin-bottom: 10px;">
+                    <div style="width: 150px; height: 150px; background-color: #4CAF50; color: white; 
+                        display: flex; align-items: center; justify-content: center; 
+                        border-radius: 50%; font-size: 50px; font-weight: bold;
+                        box-shadow: 0 4px 10px rgba(0,0,0,0.1);">
+                        {initials}
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        with st.popover("Update Portrait"):
+            # A fresh uploader key after each save, so the same file isn't sent again on the rerun
+            upload_round = st.session_state.setdefault("photo_upload_round", 0)
+            uploaded_file = st.file_uploader("Upload official photo", type=['png', 'jpg', 'jpeg', 'webp'], key=f"photo_upload:{upload_round}")
+            if uploaded_file:
+                with st.spinner("Writing to database..."):
+                    # The row we locked in above, so the old variants can be cleaned up
+                    if upload_student_photo(uploaded_file, student_row, student_row['class_id']):
+                        st.session_state.photo_upload_round += 1
+                        st.success("Portfolio updated!")
+                        st.rerun()
+
+    with id_col2:
+        st.markdown(f"<h1 style='margin-bottom:0; color: #1e293b;'>{student_row['full_name']}</h1>", unsafe_allow_html=True)
+        st.markdown(f"<p style='color: #64748b; font-size: 1.1em;'>REF: #{str(target_id)[:8].upper()} | GROUP: {target_gender.upper()}</p>", unsafe_allow_html=True)
+
+    st.divider()
+
+    # 2. Fetch Individual Data
+    # 2. Fetch Individual Data (UPDATED TO USE target_id)
+    # Served from the local snapshot, which only pulls rows changed since the last run,
+    # and limited to the term picked in the sidebar
+    common.sync_snapshot()
+    history = run_queries({
+        "score_history": lambda: get_student_history("scores", target_id, student_row['class_id']),
+        "attendance_history": lambda: get_student_history("attendance", target_id, student_row['class_id']),
+    })
+    df_s_scores = history["score_history"]
+    df_s_att = history["attendance_history"]
+    # Term totals from the per-student rollups; the rows above still feed the
+    # momentum chart and the logs
+    totals = get_student_totals(target_id, student_row['class_id'], {"scores": df_s_scores, "attendance": df_s_att})
+
+    # 3. Top Row Metrics
+    with recorder.span("pandas", "profile metrics"):
+        col1, col2, col3 = st.columns(3)
+
+        if not df_s_scores.empty:
+            df_s_scores['pct'] = (df_s_scores['score_value'] / df_s_scores['max_score']) * 100
+
+        # Calculate Personal Attendance % and Grade % (per category too)
+        att_pct = grade_pct = 0
+        if totals is not None:
+            att, by_cat = totals["attendance"], totals["scores"]
+            if att["sessions"].sum():
+                att_pct = att["present"].sum() / att["sessions"].sum() * 100
+            if by_cat["pct_count"].sum():
+                grade_pct = by_cat["pct_sum"].sum() / by_cat["pct_count"].sum()
+            cat_mastery = by_cat.groupby(level="category")["pct_sum"].sum() / by_cat.groupby(level="category")["pct_count"].sum()
+        else:
+            if not df_s_att.empty:
+                att_pct = df_s_att['is_present'].mean() * 100
+            if not df_s_scores.empty:
+                grade_pct = df_s_scores['pct'].mean()
+            cat_mastery = df_s_scores.groupby('category')['pct'].mean() if not df_s_scores.empty else None
+
+        # Determine academic standing with the same cutoffs the Dashboard uses
+        standing = metrics.standing(grade_pct, RISK_LIMITS)
+        risk = metrics.risk_status(att_pct, grade_pct, RISK_LIMITS) if not (df_s_att.empty or df_s_scores.empty) else None
+
+        col1.metric("Term Average", f"{grade_pct:.1f}%")
+        col2.metric("Attendance Rate", f"{att_pct:.1f}%")
+        col3.metric("Gender Group", target_gender.upper())
+
+        st.info(f"**Academic Standing:** {standing}" + (f" | **Status:** {risk}" if risk is not None else ""))
+        st.markdown("---")
+
+    # 4. Charts Section
+    with recorder.span("render", "profile charts"):
+        left_chart, right_chart = st.columns(2)
+
+        with left_chart:
+            st.subheader("Performance Momentum")
+            if not df_s_scores.empty:
+                # Sort by date
+                df_s_scores['recorded_at'] = pd.to_datetime(df_s_scores['recorded_at'])
+                momentum_df = df_s_scores.sort_values('recorded_at')
+                st.line_chart(momentum_df.set_index('recorded_at')['pct'])
+                st.caption("Chronological trend of assessment results.")
+            else:
+                st.info("No assessment data found for this student.")
+
+        with right_chart:
+            st.subheader("Mastery by Category")
+            if cat_mastery is not None and not cat_mastery.empty:
+                st.bar_chart(cat_mastery, horizontal=True)
+                st.caption("Comparison of strengths across different task types.")
+            else:
+                st.info("Record scores to view category mastery.")
+
+        st.markdown("---")
+
+    # 5. Attendance Pattern (from the class attendance bitmap)
+    with recorder.span("render", "profile attendance pattern"):
+        st.subheader("Attendance Pattern")
+        pattern_index = get_attendance_indexes([student_row['class_id']])[0]
+        student_days = pattern_index.student_days(target_id)
+        if not student_days.empty:
+            pattern = pattern_index.summary(RISK_LIMITS).set_index("student_id").loc[str(target_id)]
+            window = int(RISK_LIMITS['absence_window_days'])
+            p_col1, p_col2, p_col3 = st.columns(3)
+            p_col1.metric("Current Absence Streak", f"{pattern['current_streak']} days")
+            p_col2.metric("Longest Absence Streak", f"{pattern['longest_streak']} days")
+            p_col3.metric(f"Missed (last {window} days)", f"{pattern['missed_pct']:.1f}%")
+            if pattern['chronic']:
+                st.warning("Chronic absence: this student meets the follow-up criteria.")
+            show_attendance_calendar(student_days)
+        else:
+            st.info("No attendance logs found.")
+        st.markdown("---")
+
+    # 6. Raw Data History
+    st.subheader("Historical Record")
+    tab_h_scores, tab_h_att = st.tabs(["Gradebook Entries", "Attendance Logs"])
+
+    with tab_h_scores:
+        if not df_s_scores.empty:
+            st.dataframe(df_s_scores[['recorded_at', 'category', 'score_value', 'max_score', 'pct']], use_container_width=True, hide_index=True)
+        else:
+            st.write("No grades recorded.")
+
+    with tab_h_att:
+        if not df_s_att.empty:
+            # Highlight absences
+            df_s_att['Status'] = df_s_att['is_present'].apply(lambda x: "✅ Present" if x else "❌ Absent")
+            st.dataframe(df_s_att[['date', 'Status']].sort_values('date', ascending=False), use_container_width=True, hide_index=True)
+        else:
+            st.write("No attendance logs found.")
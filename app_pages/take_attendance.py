@@ -0,0 +1,92 @@
+import streamlit as st
+import datetime
+import pandas as pd
+import attendance_index
+import journal
+import writes
+from common import editor_source, get_attendance_for_day, get_classes, get_students, pending_for, run_queries
+
+# --- PAGE: ATTENDANCE ---
+st.header("Daily Attendance")
+classes_data = get_classes()
+
+if not classes_data.data:
+    st.warning("Please add a class in Setup first.")
+else:
+    col1, col2 = st.columns(2)
+    selected_date = col1.date_input("Date", datetime.date.today())
+    class_map = {c['name']: c['id'] for c in classes_data.data}
+    selected_class_name = col2.selectbox("Class", list(class_map.keys()))
+    class_id = class_map[selected_class_name]
+
+    # 1. FETCH STUDENTS & EXISTING RECORDS (in parallel)
+    # Only when the class or date changes; ticking boxes in the editor reruns
+    # just the sheet fragment below and never goes back to the network
+    def load_sheet():
+        loaded = run_queries({
+            "class_roster": lambda: get_students(class_id),
+            "existing_attendance": lambda: get_attendance_for_day(class_id, selected_date),
+        })
+        students_res = loaded["class_roster"]
+        # Existing records on this date, already limited to THIS class
+        existing_att = loaded["existing_attendance"]
+
+        # Create history dict for quick lookup
+        history_dict = {str(rec['student_id']): rec['is_present'] for rec in existing_att.data}
+        # Unsynced saves from the journal win over what the server has
+        for rec in pending_for("attendance", date=selected_date):
+            history_dict[str(rec['student_id'])] = rec['is_present']
+
+        display_data = []
+        for s in students_res.data:
+            s_id = str(s['id'])
+            is_present = history_dict.get(s_id, True)
+            display_data.append({"ID": s['id'], "Student Name": s['full_name'], "Status": is_present})
+
+        return {"roster": pd.DataFrame(display_data), "history": history_dict, "existing": bool(existing_att.data)}
+
+    sheet = editor_source("sheet:attendance", (class_id, selected_date), load_sheet)
+
+    if sheet["roster"].empty:
+        st.info("No students enrolled in this class.")
+    else:
+        # NOW the warning is Class-Specific
+        if sheet["existing"]:
+            st.info(f"Records for {selected_date} in **{selected_class_name}** already exist. Saving will update them.")
+
+        @st.fragment
+        def attendance_sheet():
+            sheet = st.session_state["sheet:attendance"]
+            sheet_class_id, sheet_date = sheet["key"]
+
+            # 2. DATA EDITOR
+            edited_df = st.data_editor(
+                sheet["roster"],
+                column_config={
+                    "ID": None, # Hide the ID
+                    "Status": st.column_config.CheckboxColumn("Present?", default=True)
+                },
+                disabled=["Student Name"],
+                hide_index=True,
+                use_container_width=True,
+                key=f"attendance_editor:{sheet_class_id}:{sheet_date}"
+            )
+
+            # 3. SAVE LOGIC (Using UPSERT to prevent duplicates)
+            if st.button("Finalize Attendance"):
+                with st.spinner("Syncing records..."):
+                    # Only rows that are new for this date or were flipped get sent
+                    attendance_records, unchanged = writes.attendance_changes(edited_df, sheet["history"], sheet_date)
+
+                    if attendance_records:
+                        # Journaled locally, then upserted on (student_id, date) in the background,
+                        # so a dropped connection never loses the sheet
+                        journal.submit("attendance", attendance_records, sheet_class_id)
+                        attendance_index.record(sheet_class_id, attendance_records)
+                        # The sheet now matches what was saved
+                        sheet["history"].update({str(r['student_id']): r['is_present'] for r in attendance_records})
+                        st.success(f"Attendance saved: {len(attendance_records)} changed / {unchanged} unchanged. Syncing in the background.")
+                    else:
+                        st.info(f"Nothing to save: all {unchanged} records already match.")
+
+        attendance_sheet()
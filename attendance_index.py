@@ -0,0 +1,226 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+import journal
+import schema
+import snapshot
+
+# --- ATTENDANCE BITMAP INDEX ---
+# Per class, attendance is held as two student x school-day bit matrices
+# packed with np.packbits: "recorded" (a row exists) and "present". A school
+# day is any date the class has attendance for. Streaks, rolling windows and
+# the calendar heatmap are then a few whole-matrix NumPy ops instead of
+# groupbys over the raw rows. Indexes are built from the local snapshot (plus
+# anything still waiting in the journal), updated in place by record() when
+# "Finalize Attendance" is saved, and rebuilt after MAX_AGE seconds so saves
+# made from other machines show up. The shared indexes only change under
+# _lock; pages always get copies (cut to their term) and never see one
+# halfway through an update.
+
+MAX_AGE = 600
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _set_bits(packed, rows, cols, values):
+    # Bit order matches np.packbits: column 0 is the high bit of byte 0
+    byte = cols >> 3
+    mask = (0x80 >> (cols & 7)).astype(np.uint8)
+    np.bitwise_and.at(packed, (rows, byte), ~mask)
+    np.bitwise_or.at(packed, (rows, byte), np.where(values, mask, 0).astype(np.uint8))
+
+
+def _runs(flags):
+    # Length of the run of True ending at each column, row by row
+    counts = np.cumsum(flags, axis=1, dtype=np.int32)
+    reset = np.maximum.accumulate(np.where(flags, 0, counts), axis=1)
+    return counts - reset
+
+
+class ClassBitmap:
+    def __init__(self, student_ids, days, recorded, present):
+        self.students = pd.Index(student_ids, dtype="str")
+        self.days = np.asarray(days, dtype="datetime64[D]")
+        self.recorded = recorded
+        self.present = present
+        self.built = time.time()
+
+    @classmethod
+    def build(cls, student_ids, df_att):
+        # df_att: student_id, date, is_present rows for this class
+        students = pd.Index(pd.unique(np.asarray(student_ids, dtype=str)), dtype="str")
+        rows = students.get_indexer(df_att["student_id"].astype(str))
+        df_att = df_att[rows >= 0]
+        rows = rows[rows >= 0]
+        dates = schema.day_numbers(df_att["date"])
+        days = np.unique(dates)
+        recorded = np.zeros((len(students), len(days)), dtype=bool)
+        present = np.zeros_like(recorded)
+        cols = np.searchsorted(days, dates)
+        recorded[rows, cols] = True
+        present[rows, cols] = df_att["is_present"].to_numpy(dtype=bool)
+        return cls(students, days, np.packbits(recorded, axis=1), np.packbits(present, axis=1))
+
+    def matrices(self):
+        # Unpacked (recorded, present) bool matrices, one column per school day
+        n = len(self.days)
+        return (
+            np.unpackbits(self.recorded, axis=1, count=n).astype(bool),
+            np.unpackbits(self.present, axis=1, count=n).astype(bool),
+        )
+
+    def copy(self):
+        return ClassBitmap(self.students, self.days.copy(), self.recorded.copy(), self.present.copy())
+
+    def between(self, start, end):
+        # A copy holding only the school days from start to end (inclusive)
+        lo = np.searchsorted(self.days, np.datetime64(start, "D"))
+        hi = np.searchsorted(self.days, np.datetime64(end, "D"), side="right")
+        recorded, present = self.matrices()
+        return ClassBitmap(
+            self.students, self.days[lo:hi],
+            np.packbits(recorded[:, lo:hi], axis=1), np.packbits(present[:, lo:hi], axis=1),
+        )
+
+    def _add_students(self, student_ids):
+        new = pd.Index(student_ids, dtype="str").difference(self.students)
+        if len(new):
+            pad = ((0, len(new)), (0, 0))
+            self.students = self.students.append(new)
+            self.recorded = np.pad(self.recorded, pad)
+            self.present = np.pad(self.present, pad)
+
+    def _add_days(self, days):
+        new = np.setdiff1d(days, self.days)
+        if not len(new):
+            return
+        if self.days.size and new.min() < self.days[-1]:
+            # A back-filled date lands between existing columns: re-pack
+            recorded, present = self.matrices()
+            merged = np.union1d(self.days, new)
+            at = np.searchsorted(merged, self.days)
+            grown = np.zeros((len(self.students), len(merged)), dtype=bool)
+            grown[:, at] = recorded
+            self.recorded = np.packbits(grown, axis=1)
+            grown[:] = False
+            grown[:, at] = present
+            self.present = np.packbits(grown, axis=1)
+            self.days = merged
+            return
+        # New days only ever append columns; grow the packed width if needed
+        self.days = np.concatenate([self.days, new])
+        width = (len(self.days) + 7) // 8
+        pad = ((0, 0), (0, width - self.recorded.shape[1]))
+        self.recorded = np.pad(self.recorded, pad)
+        self.present = np.pad(self.present, pad)
+
+    def record(self, records):
+        # records: dicts with student_id, date, is_present (as saved by the app)
+        if not records:
+            return
+        ids = [str(r["student_id"]) for r in records]
+        dates = np.array([str(r["date"])[:10] for r in records], dtype="datetime64[D]")
+        self._add_students(ids)
+        self._add_days(dates)
+        rows = self.students.get_indexer(ids)
+        cols = np.searchsorted(self.days, dates)
+        _set_bits(self.recorded, rows, cols, np.ones(len(rows), dtype=bool))
+        _set_bits(self.present, rows, cols, np.array([bool(r["is_present"]) for r in records]))
+
+    def streaks(self):
+        # Current and longest run of recorded absences per student
+        recorded, present = self.matrices()
+        if not self.days.size:
+            zeros = np.zeros(len(self.students), dtype=np.int32)
+            return zeros, zeros
+        runs = _runs(recorded & ~present)
+        return runs[:, -1], runs.max(axis=1)
+
+    def missed_pct(self, days):
+        # Share of the last `days` school days each student was marked absent
+        recorded, present = self.matrices()
+        recorded, present = recorded[:, -days:], present[:, -days:]
+        taken = recorded.sum(axis=1)
+        absent = (recorded & ~present).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(taken > 0, absent / taken * 100, np.nan)
+
+    def daily_counts(self):
+        # Students marked and students present per school day
+        recorded, present = self.matrices()
+        return pd.DataFrame(
+            {"taken": recorded.sum(axis=0), "present": present.sum(axis=0)},
+            index=pd.DatetimeIndex(self.days, name="date"),
+        )
+
+    def student_days(self, student_id):
+        # 100 / 0 per recorded school day for one student
+        row = self.students.get_indexer([str(student_id)])[0]
+        if row < 0:
+            return pd.Series(dtype=float, name="rate")
+        recorded, present = self.matrices()
+        days = pd.DatetimeIndex(self.days[recorded[row]], name="date")
+        return pd.Series(present[row][recorded[row]] * 100.0, index=days, name="rate")
+
+    def summary(self, limits):
+        # One row per student with streaks, recent absence and the chronic flag
+        current, longest = self.streaks()
+        window = int(limits["absence_window_days"])
+        missed = self.missed_pct(window)
+        chronic = (current >= limits["absence_streak"]) | (np.nan_to_num(missed) >= limits["absence_window_pct"])
+        return pd.DataFrame({
+            "student_id": self.students,
+            "current_streak": current,
+            "longest_streak": longest,
+            "missed_pct": missed,
+            "chronic": chronic,
+        })
+
+
+def daily_rate(counts):
+    # Attendance % per day from daily_counts(), summed across classes if needed
+    counts = counts[counts["taken"] > 0]
+    return (counts["present"] / counts["taken"] * 100).rename("rate")
+
+
+def for_classes(conn, rosters, window=None):
+    # rosters: {class_id: student ids}. Every class that needs (re)building is
+    # built from one snapshot read; the rest just pick up new students.
+    # Returns copies, limited to the (start, end) window if given.
+    with _lock:
+        now = time.time()
+        stale = [cid for cid in rosters if cid not in _indexes or now - _indexes[cid].built > MAX_AGE]
+        if stale:
+            df_att = snapshot.load(conn, "attendance")
+            pending = journal.pending_records("attendance")
+        for class_id in stale:
+            student_ids = rosters[class_id]
+            index = ClassBitmap.build(student_ids, df_att[df_att["student_id"].isin(list(student_ids))])
+            # Saves still waiting to sync are newer than the snapshot
+            members = set(index.students)
+            index.record([r for r in pending if str(r["student_id"]) in members])
+            _indexes[class_id] = index
+        for class_id, student_ids in rosters.items():
+            if class_id not in stale:
+                # New students get empty rows; ones who left keep theirs until the next rebuild
+                _indexes[class_id]._add_students(student_ids)
+        return {cid: _indexes[cid].between(*window) if window else _indexes[cid].copy() for cid in rosters}
+
+
+def for_class(conn, class_id, student_ids, window=None):
+    return for_classes(conn, {class_id: student_ids}, window)[class_id]
+
+
+def record(class_id, records):
+    # Called after "Finalize Attendance"; a class that was never indexed is left for later
+    with _lock:
+        index = _indexes.get(class_id)
+        if index is not None:
+            index.record(records)
+
+
+def clear():
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,314 @@
+"""Backup and restore of TrackerAP's tables.
+
+    python -m backup export backups/2026-10-18                   # gzipped NDJSON
+    python -m backup export backups/2026-10-18 --format parquet
+    python -m backup restore backups/2026-10-18
+
+Connects with SUPABASE_URL and SUPABASE_KEY from the environment (the same
+values as the [connections.supabase] secrets).
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import sys
+import pyarrow as pa
+import pyarrow.parquet as pq
+from postgrest.types import ReturnMethod
+import loader
+import queries
+
+# --- BACKUP AND RESTORE ---
+# export() walks each table page by page (keyset on id, see loader.py) and
+# appends every page to one compressed file per table as it arrives, so
+# memory holds a single page whatever the size of the school. restore()
+# reads the files back in batches and upserts them on the tables' conflict
+# keys, so it can run into an empty project or over a live one (re-running
+# it is harmless). Ids are remapped along the way: a class or student that
+# already exists under another id keeps that id, and attendance/score rows
+# follow their student to it. History rows get fresh ids; nothing refers to
+# them.
+
+TABLES = ["classes", "students", "attendance", "scores"]
+
+# Same keys the app upserts on (importer.py, journal.py)
+CONFLICT_KEYS = {
+    "students": ["full_name", "class_id"],
+    "attendance": ["student_id", "date"],
+    "scores": ["student_id", "category", "recorded_at"],
+}
+
+EXTENSIONS = {"ndjson": ".ndjson.gz", "parquet": ".parquet"}
+MANIFEST = "manifest.json"
+BATCH_SIZE = 2000
+WRITERS = 4
+
+# Parquet column types; any other column is kept as text (UUIDs, ISO dates)
+PARQUET_TYPES = {"is_present": pa.bool_(), "score_value": pa.float64(), "max_score": pa.float64()}
+
+# Set by the database on every write (sql/002_updated_at.sql), never sent back
+SERVER_COLUMNS = ("updated_at",)
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _write_ndjson(path, pages):
+    rows = 0
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+        for page in pages:
+            f.writelines(json.dumps(r, default=str) + "\n" for r in page)
+            rows += len(page)
+    return rows
+
+
+def _write_parquet(path, pages):
+    # One row group per page; the column list comes from the first page
+    rows, writer = 0, None
+    try:
+        for page in pages:
+            if writer is None:
+                schema = pa.schema([(c, PARQUET_TYPES.get(c, pa.string())) for c in page[0]])
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            columns = {
+                f.name: [r.get(f.name) if f.name in PARQUET_TYPES else _text(r.get(f.name)) for r in page]
+                for f in schema
+            }
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            rows += len(page)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+WRITERS_BY_FORMAT = {"ndjson": _write_ndjson, "parquet": _write_parquet}
+
+
+def export(conn, directory, fmt="ndjson", on_progress=None, page_size=loader.PAGE_SIZE):
+    # Writes <table>.ndjson.gz or <table>.parquet per table plus manifest.json;
+    # on_progress(table, rows done, rows total). Returns the manifest.
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = {
+        "format": fmt,
+        "exported_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "tables": {},
+    }
+    for table in TABLES:
+        path = os.path.join(directory, table + EXTENSIONS[fmt])
+
+        def pages(table=table):
+            done = 0
+            for rows, total in loader.iter_pages(conn, table, page_size=page_size):
+                yield rows
+                done += len(rows)
+                if on_progress:
+                    on_progress(table, done, total)
+
+        # Temp file first, like the snapshot, so a failed export never
+        # leaves a truncated table next to a good manifest
+        manifest["tables"][table] = WRITERS_BY_FORMAT[fmt](path + ".tmp", pages())
+        os.replace(path + ".tmp", path)
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _read_batches(path, fmt, size):
+    if fmt == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=size):
+            yield batch.to_pylist()
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        batch = []
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _payload(row, drop=()):
+    return {k: v for k, v in row.items() if k not in SERVER_COLUMNS and k not in drop}
+
+
+def _restore_classes(conn, batches):
+    # Existing class ids are kept; otherwise a class with the same name is
+    # reused; otherwise the class is created under its exported id
+    existing = loader.fetch_frame(conn, "classes", "id, name")
+    ids = set(existing["id"].astype(str))
+    by_name = {}
+    for cid, name in zip(existing["id"].astype(str), existing["name"]):
+        by_name.setdefault(name, cid)
+
+    mapping = {}
+    for batch in batches:
+        new = []
+        for r in batch:
+            old = str(r["id"])
+            if old in ids:
+                mapping[old] = old
+            elif r["name"] in by_name:
+                mapping[old] = by_name[r["name"]]
+            else:
+                mapping[old] = old
+                new.append(_payload(r))
+        if new:
+            conn.table("classes").upsert(new, on_conflict="id", returning=ReturnMethod.minimal).execute()
+    return mapping
+
+
+def _restore_students(conn, batches, class_ids):
+    # {exported student id: id in this project}, plus how many rows had no class
+    existing = loader.fetch_frame(conn, "students", "id, full_name, class_id")
+    ids = set(existing["id"].astype(str))
+    by_key = dict(zip(zip(existing["full_name"], existing["class_id"].astype(str)), existing["id"].astype(str)))
+    on_conflict = ", ".join(CONFLICT_KEYS["students"])
+
+    mapping, skipped = {}, 0
+    for batch in batches:
+        # Ids are only sent when free, and each upsert needs the same columns
+        # in every row, so students with and without an id go separately
+        with_id, without_id, waiting = [], [], []
+        for r in batch:
+            class_id = class_ids.get(str(r.get("class_id")))
+            if class_id is None:
+                skipped += 1
+                continue
+            old = str(r["id"])
+            row = {**_payload(r, drop=("id",)), "class_id": class_id}
+            key = (row["full_name"], class_id)
+            if key in by_key:
+                mapping[old] = by_key[key]
+                without_id.append(row)
+            elif old not in ids:
+                mapping[old] = by_key[key] = old
+                ids.add(old)
+                with_id.append({"id": old, **row})
+            else:
+                # The exported id now belongs to another student
+                waiting.append((old, key))
+                without_id.append(row)
+        if with_id:
+            conn.table("students").upsert(with_id, on_conflict=on_conflict, returning=ReturnMethod.minimal).execute()
+        if without_id:
+            res = conn.table("students").upsert(without_id, on_conflict=on_conflict).execute()
+            for r in res.data or []:
+                by_key[(r["full_name"], str(r["class_id"]))] = str(r["id"])
+            for old, key in waiting:
+                mapping[old] = by_key[key]
+    return mapping, skipped
+
+
+def _restore_history(conn, table, batches, student_ids, on_progress=None):
+    # Upserts up to WRITERS batches side by side; rows of students that were
+    # not restored are counted and skipped
+    keys = CONFLICT_KEYS[table]
+    on_conflict = ", ".join(keys)
+    restored = skipped = 0
+
+    def send(rows):
+        return lambda: conn.table(table).upsert(
+            rows, on_conflict=on_conflict, returning=ReturnMethod.minimal,
+        ).execute()
+
+    def flush(pending):
+        queries.run_parallel({str(i): send(rows) for i, rows in enumerate(pending)}, timeout=300)
+        if on_progress:
+            on_progress(table, restored + skipped, None)
+
+    pending = []
+    for batch in batches:
+        rows = {}
+        for r in batch:
+            student_id = student_ids.get(str(r.get("student_id")))
+            if student_id is None:
+                skipped += 1
+                continue
+            row = {**_payload(r, drop=("id",)), "student_id": student_id}
+            # One row per key: Postgres refuses to upsert the same key twice in a statement
+            rows[tuple(str(row[k]) for k in keys)] = row
+        restored += len(rows)
+        if rows:
+            pending.append(list(rows.values()))
+        if len(pending) == WRITERS:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+    return restored, skipped
+
+
+def restore(conn, directory, on_progress=None, batch_size=BATCH_SIZE):
+    # Loads an export() directory into the project behind `conn`. Returns
+    # (restored, skipped): rows upserted per table, and rows left out per
+    # table because their class or student was missing from the backup.
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    fmt = manifest["format"]
+
+    def batches(table):
+        if not manifest["tables"].get(table):
+            return iter(())
+        return _read_batches(os.path.join(directory, table + EXTENSIONS[fmt]), fmt, batch_size)
+
+    class_ids = _restore_classes(conn, batches("classes"))
+    student_ids, skipped_students = _restore_students(conn, batches("students"), class_ids)
+    restored = {"classes": len(class_ids), "students": len(student_ids)}
+    skipped = {"classes": 0, "students": skipped_students}
+    for table in ("attendance", "scores"):
+        restored[table], skipped[table] = _restore_history(conn, table, batches(table), student_ids, on_progress)
+    return restored, skipped
+
+
+def connect():
+    from supabase import create_client  # installed with st-supabase-connection
+    try:
+        return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    except KeyError as e:
+        raise SystemExit(f"Set {e.args[0]} to the project's URL and key.") from None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="write every table to a backup directory")
+    export_cmd.add_argument("directory")
+    export_cmd.add_argument("--format", choices=sorted(EXTENSIONS), default="ndjson")
+    restore_cmd = commands.add_parser("restore", help="upsert a backup directory into the project")
+    restore_cmd.add_argument("directory")
+    restore_cmd.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    def report(table, done, total):
+        print(f"\r{table}: {done:,}" + (f" of {total:,}" if total else "") + " rows", end="", file=sys.stderr)
+
+    conn = connect()
+    if args.command == "export":
+        manifest = export(conn, args.directory, args.format, on_progress=report)
+        print(file=sys.stderr)
+        for table, rows in manifest["tables"].items():
+            print(f"{table:<12}{rows:>12,} rows")
+    else:
+        restored, skipped = restore(conn, args.directory, on_progress=report, batch_size=args.batch_size)
+        print(file=sys.stderr)
+        for table in TABLES:
+            print(f"{table:<12}{restored[table]:>12,} restored" + (f", {skipped[table]:,} skipped" if skipped[table] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
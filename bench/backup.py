@@ -0,0 +1,100 @@
+"""Backup round-trip benchmark for TrackerAP.
+
+    python -m bench.backup --scale medium                    # gzipped NDJSON
+    python -m bench.backup --scale large --format parquet
+    python -m bench.backup --scale small --into-existing     # restore over a live copy
+
+Exports a synthetic school from fake_supabase.FakeSupabaseConnection with
+backup.export(), restores it into a second fake with backup.restore() and
+checks that every class, student, attendance mark and score came back (by
+conflict key, ids remapped). Prints the time, file size and peak Python
+memory of each half. Exits non-zero when the copy differs.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import backup  # noqa: E402
+from bench import synthetic  # noqa: E402
+from fake_supabase import FakeSupabaseConnection  # noqa: E402
+
+# Columns compared per table (ids and updated_at are expected to differ)
+COMPARED = {
+    "classes": ["name"],
+    "students": ["full_name", "class", "gender", "photo_url"],
+    "attendance": ["student", "date", "is_present"],
+    "scores": ["student", "category", "recorded_at", "score_value", "max_score"],
+}
+
+
+def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def contents(tables):
+    # Each table as a set of comparable tuples, with students and classes
+    # referred to by name instead of id
+    class_names = {str(c["id"]): c["name"] for c in tables.get("classes", [])}
+    students = {
+        str(s["id"]): (s["full_name"], class_names.get(str(s["class_id"])))
+        for s in tables.get("students", [])
+    }
+    out = {}
+    for table, columns in COMPARED.items():
+        rows = set()
+        for r in tables.get(table, []):
+            values = {**r, "class": class_names.get(str(r.get("class_id"))), "student": students.get(str(r.get("student_id")))}
+            rows.add(tuple(float(values[c]) if c in ("score_value", "max_score") else values.get(c) for c in columns))
+        out[table] = rows
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(synthetic.SCALES), default="small")
+    parser.add_argument("--format", choices=sorted(backup.EXTENSIONS), default="ndjson")
+    parser.add_argument("--into-existing", action="store_true",
+                        help="restore over a copy of the same school instead of an empty project")
+    args = parser.parse_args(argv)
+
+    tables = synthetic.generate(**synthetic.SCALES[args.scale], end=synthetic.datetime.date(2026, 6, 30))
+    print(f"[{args.scale}] " + ", ".join(f"{name}: {len(rows):,}" for name, rows in tables.items()))
+    source = FakeSupabaseConnection(tables)
+    target = FakeSupabaseConnection(tables if args.into_existing else {})
+
+    with tempfile.TemporaryDirectory(prefix="trackerap-backup-") as directory:
+        _, export_s, export_mb = _measure(lambda: backup.export(source, directory, args.format))
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        (restored, skipped), restore_s, restore_mb = _measure(lambda: backup.restore(target, directory))
+
+    print(f"{'step':<10}{'seconds':>10}{'peak MB':>10}")
+    print(f"{'export':<10}{export_s:>10.1f}{export_mb:>10.1f}   {size / 1024 / 1024:.1f} MB on disk ({args.format})")
+    print(f"{'restore':<10}{restore_s:>10.1f}{restore_mb:>10.1f}   " + ", ".join(f"{t}: {n:,}" for t, n in restored.items()))
+
+    expected, actual = contents(source.tables), contents(target.tables)
+    problems = [
+        f"{table}: {len(expected[table] - actual[table]):,} missing, {len(actual[table] - expected[table]):,} unexpected"
+        for table in COMPARED if expected[table] != actual[table]
+    ]
+    problems += [f"{table}: {n:,} rows skipped" for table, n in skipped.items() if n]
+    for line in problems:
+        print("MISMATCH", line)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Page benchmarks for TrackerAP.
+
+    python -m bench.run --scale small            # compare against baselines.json
+    python -m bench.run --scale small --save     # record new baselines
+    python -m bench.run --classes 20 --students-per-class 40 --years 2
+
+Every page of app.py is driven through Streamlit's AppTest against a
+synthetic school served by fake_supabase.FakeSupabaseConnection. For each
+page we report the cold render (empty caches), a warm rerun, the queries
+and rows/bytes transferred (from perf.py's rerun log) and peak Python
+memory. Exits non-zero when a page regresses against the stored baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="trackerap-bench-")
+os.environ["TRACKERAP_SNAPSHOT_DIR"] = os.path.join(WORKDIR, "snapshot")
+os.environ["TRACKERAP_JOURNAL"] = os.path.join(WORKDIR, "journal.sqlite3")
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import attendance_index  # noqa: E402
+import cache  # noqa: E402
+import perf  # noqa: E402
+import snapshot  # noqa: E402
+from bench import synthetic  # noqa: E402
+from fake_supabase import FakeSupabaseConnection  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+# Page title -> script in app_pages/ (Login is app.py itself, logged out)
+PAGE_FILES = {
+    "Login": None,
+    "Dashboard": "app_pages/dashboard.py",
+    "Student Profile": "app_pages/student_profile.py",
+    "Take Attendance": "app_pages/take_attendance.py",
+    "Record Scores": "app_pages/record_scores.py",
+    "First Time Setup": "app_pages/setup.py",
+    "Manage Records": "app_pages/manage_records.py",
+    "Export Reports": "app_pages/export_reports.py",
+}
+PAGES = list(PAGE_FILES)
+
+# Allowed slowdown before a page counts as regressed; timings are noisy,
+# transfer counts are not
+TIME_TOLERANCE = 1.5
+COUNT_TOLERANCE = 1.0
+
+
+def _reset():
+    cache.clear()
+    attendance_index.clear()
+    snapshot.clear()
+
+
+def _app(fake, page):
+    st.connection = lambda *args, **kwargs: fake
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.secrets["general"] = {"admin_password": "bench"}
+    if PAGE_FILES[page]:
+        at.session_state["logged_in"] = True
+        at.switch_page(PAGE_FILES[page])
+    return at
+
+
+def _last_rerun(log_path):
+    with open(log_path) as f:
+        reruns = [json.loads(line) for line in f if '"kind": "rerun"' in line]
+    return reruns[-1] if reruns else {}
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+
+def bench_page(fake, page, repeats):
+    log_path = os.path.join(WORKDIR, "perf.jsonl")
+    perf.LOG_PATH = log_path
+    open(log_path, "w").close()
+
+    cold = []
+    for _ in range(repeats):
+        _reset()
+        cold.append(_timed_run(_app(fake, page)))
+    transfer = _last_rerun(log_path)
+
+    at = _app(fake, page)
+    at.run()
+    warm = [_timed_run(at) for _ in range(repeats)]
+
+    _reset()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    _app(fake, page).run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "cold_ms": round(statistics.median(cold), 1),
+        "warm_ms": round(statistics.median(warm), 1),
+        "queries": transfer.get("queries", 0),
+        "rows": transfer.get("rows", 0),
+        "bytes": transfer.get("bytes", 0),
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+def compare(results, baseline):
+    regressions = []
+    for page, now in results.items():
+        before = baseline.get(page)
+        if not before:
+            continue
+        for metric in ("cold_ms", "warm_ms", "peak_mb"):
+            if before[metric] and now[metric] > before[metric] * TIME_TOLERANCE:
+                regressions.append(f"{page}: {metric} {before[metric]} -> {now[metric]}")
+        for metric in ("queries", "rows", "bytes"):
+            if now[metric] > before[metric] * COUNT_TOLERANCE:
+                regressions.append(f"{page}: {metric} {before[metric]} -> {now[metric]}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(synthetic.SCALES), default="small")
+    parser.add_argument("--classes", type=int)
+    parser.add_argument("--students-per-class", type=int)
+    parser.add_argument("--years", type=float)
+    parser.add_argument("--assessments-per-week", type=int)
+    parser.add_argument("--pages", nargs="+", default=PAGES, choices=PAGES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    params = dict(synthetic.SCALES[args.scale])
+    for name in params:
+        value = getattr(args, name)
+        if value is not None:
+            params[name] = value
+    custom = params != synthetic.SCALES[args.scale]
+    label = args.scale if not custom else "custom-" + "-".join(f"{v}" for v in params.values())
+
+    # Fixed end date keeps the generated school identical between runs
+    tables = synthetic.generate(**params, end=synthetic.datetime.date(2026, 6, 30))
+    print(f"[{label}] " + ", ".join(f"{name}: {len(rows):,}" for name, rows in tables.items()))
+    fake = FakeSupabaseConnection(tables)
+
+    results = {}
+    print(f"{'page':<18}{'cold ms':>10}{'warm ms':>10}{'queries':>9}{'rows':>10}{'KB':>10}{'peak MB':>9}")
+    for page in args.pages:
+        r = bench_page(fake, page, args.repeats)
+        results[page] = r
+        print(f"{page:<18}{r['cold_ms']:>10}{r['warm_ms']:>10}{r['queries']:>9}{r['rows']:>10,}"
+              f"{r['bytes'] / 1024:>10,.1f}{r['peak_mb']:>9}")
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    if args.save:
+        baselines[label] = {"params": params, "pages": results}
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline '{label}' saved to {BASELINES}")
+        return 0
+
+    if label not in baselines:
+        print(f"No baseline for '{label}' yet; run again with --save to record one.")
+        return 0
+    regressions = compare(results, baselines[label]["pages"])
+    for line in regressions:
+        print("REGRESSION", line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
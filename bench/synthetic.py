@@ -0,0 +1,96 @@
+import datetime
+import uuid
+import numpy as np
+
+# --- SYNTHETIC SCHOOL GENERATOR ---
+# Builds classes, students, daily attendance and scores shaped like the real
+# tables, deterministically from a seed. Each student gets an attendance
+# probability and an ability level, so the Dashboard's risk tabs have a
+# realistic spread of on-track and struggling students.
+
+# Same list as the Record Scores page
+CATEGORIES = ["Quiz", "Exercise", "Midterm", "Assignment", "Presentation", "Group Work", "Class Participation"]
+MAX_SCORES = {"Midterm": 100.0, "Assignment": 20.0}
+
+SCALES = {
+    "small": {"classes": 4, "students_per_class": 25, "years": 0.25, "assessments_per_week": 2},
+    "medium": {"classes": 12, "students_per_class": 35, "years": 1, "assessments_per_week": 3},
+    "large": {"classes": 40, "students_per_class": 40, "years": 3, "assessments_per_week": 3},
+}
+
+
+def _uuid(kind, n):
+    # Stable, valid UUIDs so runs with the same seed are identical
+    return str(uuid.UUID(int=(kind << 64) | n))
+
+
+def school_days(years, end=None):
+    end = end or datetime.date.today()
+    days = np.arange(np.datetime64(end) - np.timedelta64(int(years * 365), "D"), np.datetime64(end) + 1)
+    return days[np.is_busday(days)].astype("datetime64[D]").astype(str).tolist()
+
+
+def generate(classes=4, students_per_class=25, years=0.25, assessments_per_week=2, seed=0, end=None):
+    rng = np.random.default_rng(seed)
+    days = school_days(years, end)
+
+    class_rows = [{"id": _uuid(1, c), "name": f"Grade {c + 1}"} for c in range(classes)]
+    students = []
+    for c, cls in enumerate(class_rows):
+        for s in range(students_per_class):
+            n = c * students_per_class + s
+            students.append({
+                "id": _uuid(2, n),
+                "full_name": f"Student {n:05d}",
+                "class_id": cls["id"],
+                "gender": "Boy" if rng.random() < 0.5 else "Girl",
+                "photo_url": None,
+            })
+
+    n_students = len(students)
+    presence = rng.beta(8, 1.5, n_students)
+    ability = rng.beta(5, 2.5, n_students)
+
+    present = rng.random((n_students, len(days))) < presence[:, None]
+    attendance = [
+        {
+            "id": _uuid(3, i * len(days) + d),
+            "student_id": student["id"],
+            "date": day,
+            "is_present": bool(present[i, d]),
+            "updated_at": f"{day}T16:00:00+00:00",
+        }
+        for i, student in enumerate(students)
+        for d, day in enumerate(days)
+    ]
+
+    # Assessments spread over the school days, cycling through the categories
+    n_assessments = max(int(len(days) / 5 * assessments_per_week), 1)
+    picks = np.linspace(0, len(days) - 1, n_assessments).astype(int)
+    assessments = list(dict.fromkeys(
+        (days[p], CATEGORIES[k % len(CATEGORIES)]) for k, p in enumerate(picks)
+    ))
+    noise = rng.normal(0, 0.12, (n_students, len(assessments)))
+    scores = []
+    for a, (day, category) in enumerate(assessments):
+        max_score = MAX_SCORES.get(category, 10.0)
+        values = np.clip(ability + noise[:, a], 0, 1) * max_score
+        for i, student in enumerate(students):
+            scores.append({
+                "id": _uuid(4, a * n_students + i),
+                "student_id": student["id"],
+                "category": category,
+                "score_value": round(float(values[i]), 1),
+                "max_score": max_score,
+                "recorded_at": day,
+                "updated_at": f"{day}T16:00:00+00:00",
+            })
+
+    # One term over the whole range, so the sidebar's default window (see
+    # terms.py) covers the generated history whatever today's date is
+    term_rows = [{"id": _uuid(5, 0), "name": "Synthetic Term", "start_date": days[0], "end_date": days[-1]}]
+
+    return {
+        "classes": class_rows, "students": students, "attendance": attendance, "scores": scores,
+        "terms": term_rows,
+    }
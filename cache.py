@@ -0,0 +1,431 @@
+import base64
+import concurrent.futures
+import copy
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from postgrest import APIResponse
+import schema
+
+# --- WRITE-AWARE READ CACHE ---
+# Process-wide, so every teacher session on this server shares it. Each entry
+# records which tables it was built from and which class it belongs to
+# (None = whole school). Write paths call invalidate(table, class_id) and only
+# the entries that could have changed are dropped; the TTL is just a safety
+# net for edits made outside the app (Supabase console, other servers).
+#
+# Replicas share it through a small Redis-style backend picked with
+# TRACKERAP_CACHE_URL: memory:// (the default, this process only),
+# sqlite:///path/cache.sqlite3 (replicas on one host or volume) or
+# redis://host:6379/0. The backend holds:
+#   - a version counter per (table, class) scope, bumped by invalidate(), so a
+#     write on any replica makes the matching entries stale everywhere (other
+#     replicas notice within VERSION_POLL seconds);
+#   - the loaded values themselves, so one replica's fetch serves the others;
+#   - short-lived locks, so identical loads are single-flight across
+#     replicas as well as across threads: one fetch per key, everyone else
+#     waits for its result.
+# Database load then follows the number of distinct reads, not sessions.
+# With memory:// only the version counters live in the backend; values are
+# kept once, in this process's entries. Expired entries are swept every
+# SWEEP_EVERY seconds and at most MAX_ENTRIES are kept (soonest to expire
+# go first), so per-search keys cannot grow memory without bound.
+#
+# Nothing read back from the backend is unpickled: whoever can write to the
+# SQLite file or the Redis server could otherwise run code in every replica.
+# Values go in as JSON, with DataFrames and Series as Arrow IPC streams (see
+# _encode). Values of any other type are not shared and stay in the loading
+# replica's memory. Every caller of cached() gets its own deep copy, so a page
+# adding a column to a result never changes it for other sessions.
+
+DEFAULT_TTL = 600
+CACHE_URL = os.environ.get("TRACKERAP_CACHE_URL", "memory://")
+PREFIX = "trackerap:"
+VERSION_POLL = 0.5
+LOCK_TTL = 30
+WAIT_STEP = 0.05
+SWEEP_EVERY = 60
+MAX_ENTRIES = 2000
+
+
+class MemoryBackend:
+    # In-process stand-in for the handful of Redis commands used here
+    PURGE_EVERY = 60
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._purged = 0.0
+
+    def _get(self, name, now):
+        item = self._data.get(name)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[name]
+            return None
+        return None if item is None else item[0]
+
+    def get(self, name):
+        with self._lock:
+            return self._get(name, time.time())
+
+    def mget(self, names):
+        with self._lock:
+            now = time.time()
+            return [self._get(name, now) for name in names]
+
+    def set(self, name, value, ex=None, nx=False):
+        with self._lock:
+            now = time.time()
+            if nx and self._get(name, now) is not None:
+                return None
+            self._data[name] = (value, now + ex if ex else None)
+            if now - self._purged > self.PURGE_EVERY:
+                self._purged = now
+                for key in [k for k, item in self._data.items() if item[1] is not None and item[1] <= now]:
+                    del self._data[key]
+            return True
+
+    def incr(self, name):
+        with self._lock:
+            value = int(self._get(name, time.time()) or 0) + 1
+            self._data[name] = (str(value).encode(), None)
+            return value
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def delete_if_equal(self, name, value):
+        with self._lock:
+            if self._get(name, time.time()) != value:
+                return 0
+            del self._data[name]
+            return 1
+
+
+class SQLiteBackend:
+    # The same commands on a SQLite file (WAL), one connection per thread
+    PURGE_EVERY = 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._purged = 0.0
+        self._db().execute(
+            "CREATE TABLE IF NOT EXISTS kv (name TEXT PRIMARY KEY, value BLOB, expires REAL)"
+        )
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def get(self, name):
+        return self.mget([name])[0]
+
+    def mget(self, names):
+        if not names:
+            return []
+        rows = dict(self._db().execute(
+            f"SELECT name, value FROM kv WHERE name IN ({','.join('?' * len(names))}) "
+            "AND (expires IS NULL OR expires > ?)",
+            [*names, time.time()],
+        ).fetchall())
+        return [rows.get(name) for name in names]
+
+    def set(self, name, value, ex=None, nx=False):
+        db = self._db()
+        now = time.time()
+        expires = now + ex if ex else None
+        if not nx:
+            db.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (name, value, expires))
+            if now - self._purged > self.PURGE_EVERY:
+                self._purged = now
+                db.execute("DELETE FROM kv WHERE expires <= ?", (now,))
+            return True
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM kv WHERE name = ? AND expires <= ?", (name, now))
+            added = db.execute("INSERT OR IGNORE INTO kv VALUES (?, ?, ?)", (name, value, expires)).rowcount
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return True if added else None
+
+    def incr(self, name):
+        return self._db().execute(
+            "INSERT INTO kv VALUES (?, 1, NULL) "
+            "ON CONFLICT(name) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+            (name,),
+        ).fetchone()[0]
+
+    def delete(self, *names):
+        if not names:
+            return 0
+        return self._db().execute(
+            f"DELETE FROM kv WHERE name IN ({','.join('?' * len(names))})", names
+        ).rowcount
+
+    def delete_if_equal(self, name, value):
+        return self._db().execute("DELETE FROM kv WHERE name = ? AND value = ?", (name, value)).rowcount
+
+
+# Redis has no compare-and-delete command; this is the usual script for it
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+
+def connect(url):
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # only needed when a Redis server is configured
+        return redis.Redis.from_url(url)
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    raise ValueError(f"Unsupported TRACKERAP_CACHE_URL: {url}")
+
+
+_backend = connect(CACHE_URL)
+_lock = threading.Lock()
+_entries = {}
+_inflight = {}
+_versions = {}
+_versions_read = [0.0]
+_swept = [0.0]
+_MISS = object()
+
+
+def _scopes(tables, class_id):
+    # A whole-school entry goes stale on a write to any class ("any"); a class
+    # entry only on its own class. "*" is bumped by table-wide invalidations.
+    scope = "any" if class_id is None else class_id
+    return tuple(
+        f"{PREFIX}v:{table}:{s}" for table in sorted(tables) for s in ("*", scope)
+    )
+
+
+def _remember(pairs):
+    # Versions only ever go up, whichever reader or writer gets here first
+    with _lock:
+        for name, version in pairs:
+            _versions[name] = max(_versions.get(name, 0), int(version or 0))
+
+
+def _current(scopes):
+    now = time.monotonic()
+    if now - _versions_read[0] > VERSION_POLL or any(s not in _versions for s in scopes):
+        names = list(set(_versions) | set(scopes))
+        _remember(zip(names, _backend.mget(names)))
+        _versions_read[0] = now
+    return tuple(_versions.get(s, 0) for s in scopes)
+
+
+def _frame_text(df):
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode()
+
+
+def _frame(text):
+    df = pa.ipc.open_stream(base64.b64decode(text)).read_all().to_pandas()
+    if "student_id" in df.columns and isinstance(df["student_id"].dtype, pd.CategoricalDtype):
+        # Student codes are per process (see schema.py): re-code against ours
+        df["student_id"] = schema.student_ids(schema.student_codes(df["student_id"]))
+    return df
+
+
+def _encode(value):
+    # JSON-ready form of a cached value. Every JSON object in it is a
+    # one-key tag, so plain dicts (any keys) are tagged too; raises TypeError
+    # for anything else.
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_encode(v) for v in value]}
+    if isinstance(value, dict):
+        return {"dict": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, pd.DataFrame):
+        return {"frame": _frame_text(value)}
+    if isinstance(value, pd.Series):
+        return {"series": [_frame_text(value.to_frame("value")), _encode(value.name)]}
+    if isinstance(value, datetime.datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"date": value.isoformat()}
+    if isinstance(value, APIResponse):
+        return {"response": [_encode(value.data), _encode(value.count)]}
+    raise TypeError(f"{type(value).__name__} values are not shared")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    (tag, body), = value.items()
+    if tag == "tuple":
+        return tuple(_decode(v) for v in body)
+    if tag == "dict":
+        return {_decode(k): _decode(v) for k, v in body}
+    if tag == "frame":
+        return _frame(body)
+    if tag == "series":
+        return _frame(body[0])["value"].rename(_decode(body[1]))
+    if tag == "datetime":
+        return datetime.datetime.fromisoformat(body)
+    if tag == "date":
+        return datetime.date.fromisoformat(body)
+    if tag == "response":
+        return APIResponse(data=_decode(body[0]), count=_decode(body[1]))
+    raise ValueError(f"Unknown cached value tag: {tag}")
+
+
+def _shared_get(name, versions):
+    raw = _backend.get(name)
+    if raw is None:
+        return _MISS
+    try:
+        stored = json.loads(raw)
+        if tuple(stored["versions"]) != versions:
+            return _MISS
+        return _decode(stored["value"])
+    except (ValueError, KeyError, TypeError, pa.ArrowException):
+        return _MISS  # unreadable (another version's format): load it again
+
+
+def _release(lock, token):
+    # Only the holder's own token is deleted: a lock that expired and was
+    # taken over by another replica stays with it
+    if hasattr(_backend, "delete_if_equal"):
+        _backend.delete_if_equal(lock, token)
+    else:
+        _backend.eval(RELEASE_SCRIPT, 1, lock, token)
+
+
+def _load_shared(key, load, versions, ttl):
+    # One replica loads while the others wait for the value to appear; a
+    # holder that died only delays the rest by LOCK_TTL. The in-process
+    # backend has nothing to share: cached() already single-flights threads.
+    if isinstance(_backend, MemoryBackend):
+        return load()
+    name = f"{PREFIX}val:{key!r}"
+    lock = f"{PREFIX}lock:{key!r}"
+    token = uuid.uuid4().hex.encode()
+    deadline = time.monotonic() + LOCK_TTL
+    owned = False
+    while True:
+        value = _shared_get(name, versions)
+        if value is not _MISS:
+            return value
+        owned = bool(_backend.set(lock, token, ex=LOCK_TTL, nx=True))
+        if owned:
+            # The previous holder may have stored the value and released the
+            # lock between our check and our set
+            value = _shared_get(name, versions)
+            if value is not _MISS:
+                _release(lock, token)
+                return value
+            break
+        if time.monotonic() > deadline:
+            break
+        time.sleep(WAIT_STEP)
+    try:
+        value = load()
+        try:
+            raw = json.dumps({"versions": list(versions), "value": _encode(value)})
+        except (TypeError, ValueError, pa.ArrowException):
+            return value  # not shareable: this replica keeps it in memory only
+        _backend.set(name, raw.encode(), ex=int(ttl))
+        return value
+    finally:
+        if owned:
+            _release(lock, token)
+
+
+def _sweep(now):
+    # Caller holds _lock
+    _swept[0] = now
+    for key in [k for k, entry in _entries.items() if entry[0] <= now]:
+        del _entries[key]
+    if len(_entries) > MAX_ENTRIES:
+        # Trim to 90% so a full cache is not re-sorted on every insert
+        by_expiry = sorted(_entries, key=lambda k: _entries[k][0])
+        for key in by_expiry[:len(_entries) - MAX_ENTRIES * 9 // 10]:
+            del _entries[key]
+
+
+def cached(key, load, tables, class_id=None, ttl=DEFAULT_TTL):
+    scopes = _scopes(tables, class_id)
+    versions = _current(scopes)
+    now = time.monotonic()
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None and hit[0] > now and hit[2] == versions:
+            return copy.deepcopy(hit[3])
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = concurrent.futures.Future()
+
+    if not leader:
+        # The same read is already running in another session: share its result
+        return copy.deepcopy(flight.result())
+
+    try:
+        # Versions were read before loading, so a write that lands meanwhile
+        # leaves this entry stale rather than cached as current
+        value = _load_shared(key, load, versions, ttl)
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(value)
+        with _lock:
+            _entries[key] = (now + ttl, scopes, versions, value)
+            if len(_entries) > MAX_ENTRIES or now - _swept[0] > SWEEP_EVERY:
+                _sweep(now)
+        return copy.deepcopy(value)
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def invalidate(table, class_id=None):
+    # class_id=None drops every entry built from `table`; a specific class
+    # drops that class's entries plus the whole-school ones that include it
+    if class_id is None:
+        bumped = [f"{PREFIX}v:{table}:*"]
+    else:
+        bumped = [f"{PREFIX}v:{table}:{class_id}", f"{PREFIX}v:{table}:any"]
+    _remember([(name, _backend.incr(name)) for name in bumped])
+    with _lock:
+        for key in [k for k, entry in _entries.items() if set(bumped) & set(entry[1])]:
+            del _entries[key]
+
+
+def clear():
+    # Forgets this process's entries; the in-process backend is reset too
+    global _backend
+    with _lock:
+        _entries.clear()
+        _versions.clear()
+        _versions_read[0] = 0.0
+        _swept[0] = 0.0
+        if isinstance(_backend, MemoryBackend):
+            _backend = MemoryBackend()
@@ -0,0 +1,362 @@
+import streamlit as st
+import altair as alt
+from st_supabase_connection import SupabaseConnection
+from postgrest.exceptions import APIError
+from storage3.utils import StorageException
+import datetime
+import re
+import threading
+import pandas as pd
+import analytics
+import attendance_index
+import cache
+import journal
+import loader
+import metrics
+import perf
+import photos
+import queries
+import rollups
+import schema
+import snapshot
+import terms
+
+# --- SHARED PAGE HELPERS ---
+# Everything the pages in app_pages/ have in common. Only the pages import
+# this module, so the login screen in app.py never loads pandas, the Supabase
+# client or the analytics code.
+
+_worker = threading.local()
+
+def recorder():
+    # This rerun's perf.Recorder, created at the top of app.py
+    return st.session_state.perf_recorder
+
+def connection():
+    # Every query made during this rerun is timed into the recorder (see perf.py).
+    # run_queries() workers have no session, so they get the connection handed over.
+    conn = getattr(_worker, "conn", None)
+    if conn is not None:
+        return conn
+    conn = st.session_state.get("perf_conn")
+    if conn is None or conn.recorder is not recorder():
+        raw_conn = st.connection("supabase", type=SupabaseConnection)
+        # Attendance/score saves land in the local journal first; this keeps its
+        # background sender running (see journal.py)
+        journal.start(raw_conn)
+        conn = st.session_state.perf_conn = perf.instrument(raw_conn, recorder())
+    return conn
+
+CUSTOM_RANGE = "Custom Range"
+
+def get_terms():
+    conn = connection()
+    return cache.cached(("terms", str(datetime.date.today())), lambda: terms.load(conn), ["terms"])
+
+def term_selector():
+    # Sidebar picker for the window every analytics read is limited to;
+    # defaults to the term today falls in
+    term_list = get_terms()
+    names = [t["name"] for t in term_list]
+    choice = st.selectbox("Term", names + [CUSTOM_RANGE], index=names.index(terms.current(term_list)["name"]), key="term_name")
+    if choice == CUSTOM_RANGE:
+        today = datetime.date.today()
+        picked = st.date_input("Date Range", (today - datetime.timedelta(days=90), today), key="term_range")
+        # Half-picked range (only the start chosen so far): just that day
+        window = (picked[0], picked[-1]) if picked else (today, today)
+    else:
+        term = term_list[names.index(choice)]
+        window = (term["start"], term["end"])
+    st.session_state.term_window = window
+    st.caption(f"{window[0]:%d %b %Y} – {window[1]:%d %b %Y}")
+
+def term_window():
+    # (start, end) picked in the sidebar; the current term if it hasn't rendered yet.
+    # Like connection(), run_queries() workers get it handed over.
+    window = getattr(_worker, "window", None) or st.session_state.get("term_window")
+    if window is None:
+        term = terms.current(get_terms())
+        window = (term["start"], term["end"])
+    return window
+
+def term_name():
+    # The selected term's name, or the dates of a custom range
+    name = st.session_state.get("term_name") or terms.current(get_terms())["name"]
+    if name == CUSTOM_RANGE:
+        start, end = term_window()
+        return f"{start:%d %b} – {end:%d %b %Y}"
+    return name
+
+def risk_limits():
+    # Risk/standing cutoffs shared by every page; override under [thresholds] in secrets.toml
+    return metrics.thresholds(st.secrets.get("thresholds"))
+
+# --- DATA HELPERS ---
+# Reads go through cache.cached(); every write path below calls cache.invalidate()
+# for the table/class it touched, so page navigation is free until something changes.
+def get_classes():
+    conn = connection()
+    return cache.cached(("classes",), lambda: conn.table("classes").select("id, name").execute(), ["classes"])
+
+def get_students(class_id):
+    conn = connection()
+    return cache.cached(
+        ("roster", class_id),
+        lambda: conn.table("students").select("id, full_name").eq("class_id", class_id).execute(),
+        ["students"], class_id,
+    )
+
+def get_roster_details(class_id):
+    conn = connection()
+    return cache.cached(
+        ("roster_details", class_id),
+        lambda: conn.table("students").select("*").eq("class_id", class_id).execute(),
+        ["students"], class_id,
+    )
+
+# The day/assessment lookups filter on the class through an inner join on
+# students, so they don't need the roster first and can run alongside it
+def get_attendance_for_day(class_id, day):
+    conn = connection()
+    return cache.cached(
+        ("attendance_day", class_id, str(day)),
+        lambda: conn.table("attendance").select("student_id, is_present, students!inner(class_id)")
+            .eq("date", str(day))
+            .eq("students.class_id", class_id)
+            .execute(),
+        ["attendance", "students"], class_id,
+    )
+
+def get_scores_for_assessment(class_id, day, category):
+    conn = connection()
+    return cache.cached(
+        ("scores_assessment", class_id, str(day), category),
+        lambda: conn.table("scores").select("student_id, score_value, students!inner(class_id)")
+            .eq("recorded_at", str(day))
+            .eq("category", category)
+            .eq("students.class_id", class_id)
+            .execute(),
+        ["scores", "students"], class_id,
+    )
+
+def get_class_scores(class_id, start, end):
+    # Every score in the class between two dates, in one (paged) range query
+    conn = connection()
+    return cache.cached(
+        ("class_scores", class_id, str(start), str(end)),
+        lambda: loader.fetch_frame(
+            conn, "scores", "student_id, category, score_value, max_score, recorded_at, students!inner(class_id)",
+            [("eq", "students.class_id", class_id), ("gte", "recorded_at", str(start)), ("lte", "recorded_at", str(end))],
+        ),
+        ["scores", "students"], class_id,
+    )
+
+def get_class_attendance(class_id, start, end):
+    # Every attendance row in the class between two dates, in one (paged) range query
+    conn = connection()
+    return cache.cached(
+        ("class_attendance", class_id, str(start), str(end)),
+        lambda: loader.fetch_frame(
+            conn, "attendance", "student_id, date, is_present, students!inner(class_id)",
+            [("eq", "students.class_id", class_id), ("gte", "date", str(start)), ("lte", "date", str(end))],
+        ),
+        ["attendance", "students"], class_id,
+    )
+
+def _in_worker(conn, window, fn):
+    def run():
+        _worker.conn, _worker.window = conn, window
+        try:
+            return fn()
+        finally:
+            _worker.conn = _worker.window = None
+    return run
+
+def run_queries(named_queries):
+    # Runs a page's independent reads side by side; stops the page with a clear message if one fails
+    conn = connection()
+    window = term_window()
+    try:
+        return queries.run_parallel({name: _in_worker(conn, window, fn) for name, fn in named_queries.items()})
+    except queries.QueryError as e:
+        st.error(f"Could not load {e.name.replace('_', ' ')}: {e.error}")
+        st.stop()
+
+def editor_source(name, key, load):
+    # Source rows for a fragment-scoped editor, kept in st.session_state[name].
+    # load() (and so the network) only runs when `key` changes, e.g. another
+    # class or date; edits inside the fragment rerun just the fragment and reuse
+    # these rows. Names start with "sheet:" so app.py can drop them on page change.
+    slot = st.session_state.get(name)
+    if slot is None or slot["key"] != key:
+        slot = st.session_state[name] = {"key": key, **load()}
+    return slot
+
+def progress_reporter(label):
+    # Feeds loader/snapshot page counts into a progress bar under the spinner
+    bar = st.progress(0.0, text=label)
+    def report(loaded, total):
+        bar.progress(min(loaded / total, 1.0) if total else 1.0, text=f"{label} ({loaded:,} of {total:,} rows)")
+    return bar, report
+
+def sync_snapshot(tables=("attendance", "scores")):
+    # The first sync downloads whole tables, so it runs here on the script
+    # thread where it can drive a progress bar; later reads (often in
+    # run_queries() workers) then only fetch deltas
+    conn = connection()
+    for table in tables:
+        if not snapshot.has_copy(table):
+            bar, report = progress_reporter(f"Downloading {table} history")
+            snapshot.load(conn, table, on_progress=report)
+            bar.empty()
+
+def get_dashboard(class_id):
+    conn = connection()
+    window = term_window()
+    key = ("dashboard", class_id, str(datetime.date.today()), window)
+    return cache.cached(
+        key, lambda: analytics.dashboard_aggregates(conn, class_id, window=window),
+        ["classes", "students", "attendance", "scores"], class_id,
+    )
+
+def get_student_history(table, student_id, class_id):
+    # Only the selected term
+    conn = connection()
+    window = term_window()
+    return cache.cached(
+        ("student_history", table, student_id, window),
+        lambda: terms.within(snapshot.load_for_student(conn, table, student_id), table, window),
+        [table], class_id,
+    )
+
+def get_student_totals(student_id, class_id, history):
+    # The student's term totals from the rollups (see rollups.py):
+    # {"attendance": present/sessions frame, "scores": per-category frame}.
+    # history: {table: the student's rows in the term}, used only for the
+    # days of partly covered months. The history reads have just synced the
+    # snapshot (and so the rollups); None if they aren't built.
+    window = term_window()
+    def load():
+        code = schema.student_codes(pd.Series([str(student_id)])).to_numpy()
+        out = {table: rollups.totals(table, window, students=code, raw=history[table]) for table in ("attendance", "scores")}
+        return None if any(t is None for t in out.values()) else out
+    return cache.cached(("student_totals", student_id, window), load, ["attendance", "scores"], class_id)
+
+def rebuild_rollups():
+    # Recounts the per-student totals behind the Dashboard (see rollups.py)
+    conn = connection()
+    for table in ("attendance", "scores"):
+        snapshot.rebuild_rollups(conn, table)
+        cache.invalidate(table)
+
+def pending_for(table, **match):
+    # Saves still waiting in the journal, so pages show what the teacher last entered
+    return [
+        r for r in journal.pending_records(table)
+        if all(str(r.get(k)) == str(v) for k, v in match.items())
+    ]
+
+def upload_student_photo(file, student, class_id=None):
+    # student: the profile's row. Shrunk, re-encoded and stored under
+    # content-hash names (see photos.py); returns the new URLs or None.
+    # SAFETY GATE: If there's no ID, stop immediately
+    if not student.get("id"):
+        st.error("Internal Error: No Student ID found. Upload cancelled.")
+        return None
+
+    conn = connection()
+    try:
+        urls = photos.store(
+            conn, student["id"], file.getvalue(),
+            old_urls=[student.get("photo_url"), student.get("photo_avatar_url")],
+        )
+    except ValueError as e:
+        st.error(f"Photo not saved: {e}")
+        return None
+    except StorageException as e:
+        st.error(f"Photo not saved: the upload to storage failed ({e}).")
+        return None
+    except APIError as e:
+        # PGRST204: no photo_avatar_url column, sql/006_student_photos.sql not run yet
+        hint = " Run sql/006_student_photos.sql in the Supabase SQL editor first." if e.code == "PGRST204" else ""
+        st.error(f"Photo not saved: {e.message}.{hint}")
+        return None
+    cache.invalidate("students", class_id)
+    return urls
+
+# --- STUDENT SEARCH ---
+# Pickers never load the whole directory: each search asks the server for the
+# top SEARCH_LIMIT name matches (a trigram-indexed ilike, see
+# sql/005_student_search.sql), optionally within one class, and the full
+# student row is only fetched once someone is picked.
+SEARCH_LIMIT = 20
+
+def search_students(text, class_id=None, limit=SEARCH_LIMIT):
+    # Words match in order anywhere in the name ("ann sm" finds "Joanne Smith");
+    # no text lists the first names alphabetically
+    conn = connection()
+    words = re.sub(r"[%_\\,()]", " ", text).lower().split()
+    def load():
+        query = conn.table("students").select("id, full_name, class_id")
+        if words:
+            query = query.ilike("full_name", f"%{'%'.join(words)}%")
+        if class_id is not None:
+            query = query.eq("class_id", class_id)
+        return query.order("full_name").limit(limit).execute().data
+    return cache.cached(("student_search", class_id, " ".join(words), limit), load, ["students"], class_id)
+
+def student_label(row):
+    return f"{row['full_name']} (Ref: {str(row['id'])[:5]})"
+
+def student_picker(label, key, class_id=None, multiple=False):
+    # Search box plus a pick list of the top matches, returning the picked id
+    # (or ids). Picks are by id, so students sharing a name stay apart, and
+    # multi-picks stay listed while the search text changes.
+    text = st.text_input("Search by Name", key=f"{key}:search", placeholder="Type part of a name")
+    labels = st.session_state.setdefault(f"{key}:labels", {})
+    matches = search_students(text, class_id)
+    labels.update({r["id"]: student_label(r) for r in matches})
+    options = [r["id"] for r in matches]
+    if multiple:
+        options += [i for i in st.session_state.get(key, []) if i not in options]
+        return st.multiselect(label, options, format_func=labels.get, key=key)
+    if not options:
+        return None
+    return st.selectbox(label, options, format_func=labels.get, key=key)
+
+def get_student(student_id):
+    # The full row for one picked student
+    conn = connection()
+    def load():
+        rows = conn.table("students").select("*").eq("id", student_id).execute().data
+        return rows[0] if rows else None
+    return cache.cached(("student", student_id), load, ["students"])
+
+def get_class_rosters(class_ids):
+    # {class_id: student ids} for several classes in one (paged) query
+    conn = connection()
+    def load():
+        df = loader.fetch_frame(conn, "students", "id, class_id", [("in", "class_id", list(class_ids))])
+        return {cid: df.loc[df["class_id"] == cid, "id"].astype(str).tolist() for cid in class_ids}
+    return cache.cached(("class_rosters", tuple(class_ids)), load, ["students"])
+
+def get_attendance_indexes(class_ids):
+    # Packed student x day attendance bits per class (see attendance_index.py),
+    # cut down to the school days of the selected term
+    conn = connection()
+    window = term_window()
+    rosters = get_class_rosters(class_ids)
+    return list(attendance_index.for_classes(conn, rosters, window).values())
+
+def show_attendance_calendar(rates):
+    # rates: attendance % per date, drawn as weeks across and weekdays down
+    cal = rates.rename("rate").reset_index()
+    cal["week"] = cal["date"] - pd.to_timedelta(cal["date"].dt.weekday, unit="D")
+    cal["weekday"] = cal["date"].dt.day_name().str[:3]
+    chart = alt.Chart(cal).mark_rect().encode(
+        x=alt.X("yearmonthdate(week):O", title=None, axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("weekday:O", title=None, sort=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]),
+        color=alt.Color("rate:Q", title="Present %", scale=alt.Scale(domain=[0, 100], scheme="redyellowgreen")),
+        tooltip=[alt.Tooltip("date:T"), alt.Tooltip("rate:Q", format=".1f", title="Present %")],
+    )
+    st.altair_chart(chart, use_container_width=True)
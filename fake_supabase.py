@@ -0,0 +1,299 @@
+import copy
+import datetime
+import re
+import uuid
+from postgrest.exceptions import APIError
+
+# --- IN-MEMORY STAND-IN FOR SupabaseConnection ---
+# Speaks the small slice of the postgrest query builder that the app uses
+# (select/filters/order/range/limit, insert/upsert/update/delete, rpc and
+# storage) against plain Python lists. Like a real PostgREST server it
+# silently caps every response at max_rows, so loaders can be checked for
+# truncation without a Supabase project.
+
+# Embedded resources such as "students!inner(class_id)" in a select list
+EMBED = re.compile(r"^(\w+)(?:!inner)?\((.*)\)$")
+
+# Tables stamped with updated_at on write (see sql/002_updated_at.sql)
+TOUCHED_TABLES = {"attendance", "scores"}
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table = table
+        self.action = "select"
+        self.columns = None
+        self.count = None
+        self.head = False
+        self.filters = []
+        self.ordering = []
+        self.offset = 0
+        self.limit_rows = None
+        self.payload = None
+        self.on_conflict = None
+        self._indexes = {}
+
+    # --- Actions ---
+    def select(self, *columns, count=None, head=None):
+        cols = ",".join(columns).replace(" ", "")
+        self.columns = None if cols in ("", "*") else re.findall(r"[^,(]+(?:\([^)]*\))?", cols)
+        self.count = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, **kwargs):
+        self.action, self.payload = "insert", json
+        return self
+
+    def upsert(self, json, on_conflict="", **kwargs):
+        self.action, self.payload = "upsert", json
+        self.on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or ["id"]
+        return self
+
+    def update(self, json, **kwargs):
+        self.action, self.payload = "update", json
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # --- Filters ---
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value): return self._filter("eq", column, value)
+    def neq(self, column, value): return self._filter("neq", column, value)
+    def gt(self, column, value): return self._filter("gt", column, value)
+    def gte(self, column, value): return self._filter("gte", column, value)
+    def lt(self, column, value): return self._filter("lt", column, value)
+    def lte(self, column, value): return self._filter("lte", column, value)
+    def in_(self, column, values): return self._filter("in", column, list(values))
+    def ilike(self, column, pattern): return self._filter("ilike", column, pattern)
+
+    def order(self, column, desc=False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size, **kwargs):
+        self.limit_rows = size
+        return self
+
+    def range(self, start, end, **kwargs):
+        self.offset = start
+        self.limit_rows = end - start + 1
+        return self
+
+    # --- Execution ---
+    def _embedded(self, table, row):
+        # Follows the foreign key by convention: students <- attendance.student_id
+        if table not in self._indexes:
+            self._indexes[table] = {str(r.get("id")): r for r in self.backend.tables.get(table, [])}
+        return self._indexes[table].get(str(row.get(table[:-1] + "_id")))
+
+    def _cell(self, row, column):
+        if "." not in column:
+            return row.get(column)
+        table, column = column.split(".", 1)
+        parent = self._embedded(table, row)
+        return None if parent is None else parent.get(column)
+
+    def _matches(self, row):
+        for op, column, value in self.filters:
+            cell = self._cell(row, column)
+            if op == "eq" and not _same(cell, value): return False
+            if op == "neq" and _same(cell, value): return False
+            if op == "in" and not any(_same(cell, v) for v in value): return False
+            if op == "ilike" and not _ilike(cell, value): return False
+            if op in ("gt", "gte", "lt", "lte"):
+                if cell is None: return False
+                a, b = str(cell), str(value)
+                if op == "gt" and not a > b: return False
+                if op == "gte" and not a >= b: return False
+                if op == "lt" and not a < b: return False
+                if op == "lte" and not a <= b: return False
+        return True
+
+    def _project(self, row):
+        if self.columns is None:
+            return dict(row)
+        out = {}
+        for c in self.columns:
+            embed = EMBED.match(c)
+            if embed:
+                parent = self._embedded(embed.group(1), row) or {}
+                out[embed.group(1)] = {k: parent.get(k) for k in embed.group(2).split(",")}
+            else:
+                out[c] = row.get(c)
+        return out
+
+    def execute(self):
+        self.backend.requests.append((self.table, self.action, list(self.filters)))
+        rows = self.backend.tables.setdefault(self.table, [])
+        if self.action == "select":
+            return self._run_select(rows)
+        if self.action == "delete":
+            removed = [r for r in rows if self._matches(r)]
+            self.backend.tables[self.table] = [r for r in rows if not self._matches(r)]
+            return FakeResponse(removed)
+        if self.action == "update":
+            changed = []
+            for r in rows:
+                if self._matches(r):
+                    r.update(copy.deepcopy(self.payload))
+                    self.backend._touch(self.table, r)
+                    changed.append(dict(r))
+            return FakeResponse(changed)
+        return self._run_write(rows)
+
+    def _run_select(self, rows):
+        matched = [r for r in rows if self._matches(r)]
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=desc)
+        total = len(matched)
+        end = None if self.limit_rows is None else self.offset + self.limit_rows
+        page = matched[self.offset:end][:self.backend.max_rows]
+        data = [] if self.head else [self._project(r) for r in page]
+        return FakeResponse(data, total if self.count else None)
+
+    def _run_write(self, rows):
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        written = []
+        conflict = self.on_conflict or []
+        index = {tuple(str(r.get(c)) for c in conflict): r for r in rows} if conflict else {}
+        for record in copy.deepcopy(payload):
+            existing = index.get(tuple(str(record.get(c)) for c in conflict)) if conflict else None
+            if existing is not None:
+                existing.update(record)
+                row = existing
+            else:
+                row = {"id": str(uuid.uuid4()), **record}
+                rows.append(row)
+                if conflict:
+                    index[tuple(str(row.get(c)) for c in conflict)] = row
+            self.backend._touch(self.table, row)
+            written.append(dict(row))
+        return FakeResponse(written)
+
+
+def _same(a, b):
+    return a == b or str(a) == str(b)
+
+
+def _ilike(cell, pattern):
+    if cell is None:
+        return False
+    text, pattern = str(cell).lower(), pattern.lower()
+    parts = pattern.split("%")
+    if len(parts) == 1:
+        return text == pattern
+    if not text.startswith(parts[0]) or not text.endswith(parts[-1]):
+        return False
+    pos = len(parts[0])
+    for part in parts[1:-1]:
+        pos = text.find(part, pos)
+        if pos < 0:
+            return False
+        pos += len(part)
+    return len(text) - len(parts[-1]) >= pos
+
+
+class FakeRpc:
+    def __init__(self, backend, name, params):
+        self.backend = backend
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        self.backend.requests.append((self.name, "rpc", self.params))
+        if self.name not in self.backend.functions:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{self.name}"})
+        return FakeResponse(self.backend.functions[self.name](self.backend, **self.params))
+
+
+class FakeBucket:
+    def __init__(self, files, name):
+        self.files = files
+        self.name = name
+
+    def upload(self, path, file, file_options=None):
+        self.files[(self.name, path)] = (bytes(file), dict(file_options or {}))
+        return {"Key": f"{self.name}/{path}"}
+
+    def download(self, path):
+        return self.files[(self.name, path)][0]
+
+    def get_public_url(self, path):
+        return f"https://fake.supabase.local/storage/v1/object/public/{self.name}/{path}"
+
+    def remove(self, paths):
+        for path in paths:
+            self.files.pop((self.name, path), None)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.files = {}
+
+    def from_(self, bucket):
+        return FakeBucket(self.files, bucket)
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+        self.storage = backend.storage
+
+    def table(self, name):
+        return FakeQuery(self.backend, name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self.backend, name, params)
+
+
+# --- Stand-ins for the functions in sql/ ---
+def delete_students(backend, p_student_ids=None, p_class_id=None):
+    ids = {str(i) for i in p_student_ids or []}
+    students = backend.tables.setdefault("students", [])
+    if p_class_id is not None:
+        ids |= {str(r["id"]) for r in students if str(r.get("class_id")) == str(p_class_id)}
+    for table in ("scores", "attendance"):
+        backend.tables[table] = [r for r in backend.tables.get(table, []) if str(r.get("student_id")) not in ids]
+    backend.tables["students"] = [r for r in students if str(r["id"]) not in ids]
+    return len(students) - len(backend.tables["students"])
+
+
+# dashboard_aggregates is left out on purpose so the pandas fallback gets exercised
+DEFAULT_FUNCTIONS = {
+    "delete_students": delete_students,
+}
+
+
+class FakeSupabaseConnection:
+    def __init__(self, tables=None, max_rows=1000, functions=None):
+        self.tables = {name: [dict(r) for r in rows] for name, rows in (tables or {}).items()}
+        self.max_rows = max_rows
+        self.functions = {**DEFAULT_FUNCTIONS, **(functions or {})}
+        self.storage = FakeStorage()
+        self.requests = []
+        self.client = FakeClient(self)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def _touch(self, table, row):
+        if table in TOUCHED_TABLES:
+            row["updated_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def synthetic_rows(n, make_row):
+    # e.g. synthetic_rows(50_000, lambda i: {"id": f"{i:08d}", "student_id": ...})
+    return [make_row(i) for i in range(n)]
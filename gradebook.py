@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# --- GRADEBOOK MATRIX ---
+# Record Scores' gradebook mode: one row per student and one column per
+# assessment (recorded_at + category) over a date range, so a week of quizzes
+# and exercises is entered on one sheet. Only cells that were filled in or
+# changed are saved, each with its own column's max_score, on the usual
+# (student_id, category, recorded_at) conflict key.
+
+SEPARATOR = " · "
+
+
+def label(recorded_at, category):
+    return f"{recorded_at}{SEPARATOR}{category}"
+
+
+def assessments(df_scores, extra=()):
+    # {label: {"recorded_at", "category", "max_score"}} for every assessment in
+    # the scores frame plus any `extra` columns added by hand, by date then category
+    columns = {}
+    if not df_scores.empty:
+        max_scores = df_scores.groupby(["recorded_at", "category"])["max_score"].max()
+        for (day, category), max_score in max_scores.items():
+            columns[label(day, category)] = {
+                "recorded_at": str(day), "category": category, "max_score": float(max_score),
+            }
+    for column in extra:
+        columns.setdefault(label(column["recorded_at"], column["category"]), column)
+    return dict(sorted(columns.items(), key=lambda kv: (kv[1]["recorded_at"], kv[1]["category"])))
+
+
+def matrix(roster, df_scores, columns):
+    # roster: [{"id", "full_name"}]; blank cells are NaN
+    students = pd.DataFrame({
+        "ID": [s["id"] for s in roster],
+        "Student Name": [s["full_name"] for s in roster],
+    })
+    if df_scores.empty:
+        values = pd.DataFrame(index=students["ID"], columns=list(columns), dtype=float)
+    else:
+        labels = df_scores["recorded_at"].astype(str) + SEPARATOR + df_scores["category"].astype(str)
+        values = df_scores.assign(label=labels).pivot_table(
+            index="student_id", columns="label", values="score_value", aggfunc="last",
+        )
+        values = values.reindex(index=students["ID"], columns=list(columns)).astype(float)
+    return pd.concat([students, values.reset_index(drop=True)], axis=1)
+
+
+def changes(original, edited, columns):
+    # One score record per cell that was filled in or changed. Cleared cells
+    # are left as they are on the server (there is no delete here).
+    labels = list(columns)
+    before = original[labels].to_numpy(dtype=float)
+    after = edited[labels].to_numpy(dtype=float)
+    changed = ~np.isnan(after) & (np.isnan(before) | (before != after))
+    rows, cols = np.nonzero(changed)
+    ids = edited["ID"].to_numpy()
+    return [
+        {
+            "student_id": ids[r],
+            "category": columns[labels[c]]["category"],
+            "score_value": float(after[r, c]),
+            "max_score": columns[labels[c]]["max_score"],
+            "recorded_at": columns[labels[c]]["recorded_at"],
+        }
+        for r, c in zip(rows, cols)
+    ]
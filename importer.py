@@ -0,0 +1,137 @@
+import pandas as pd
+
+# --- BULK STUDENT IMPORT ---
+# Reads the uploaded roster a chunk at a time (CSV through pandas' chunked
+# reader, Excel through openpyxl's read-only row iterator), cleans each chunk
+# with vectorized string ops and upserts it in bounded batches. Memory stays
+# flat however long the file is, and every skipped row ends up in a report
+# with its spreadsheet row number and the reason.
+
+CHUNK_ROWS = 5000
+BATCH_SIZE = 1000
+
+GENDERS = {
+    "boy": "Boy", "b": "Boy", "male": "Boy", "m": "Boy",
+    "girl": "Girl", "g": "Girl", "female": "Girl", "f": "Girl",
+}
+
+
+def _is_excel(file):
+    return not file.name.lower().endswith(".csv")
+
+
+def _clean_columns(columns):
+    return [str(c).strip().lower() for c in columns]
+
+
+def read_header(file):
+    file.seek(0)
+    if _is_excel(file):
+        from openpyxl import load_workbook
+        wb = load_workbook(file, read_only=True)
+        first = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        wb.close()
+        columns = [c for c in first if c is not None]
+    else:
+        columns = pd.read_csv(file, nrows=0).columns
+    file.seek(0)
+    return _clean_columns(columns)
+
+
+def _excel_chunks(file, chunk_rows):
+    from openpyxl import load_workbook
+    wb = load_workbook(file, read_only=True)
+    ws = wb.active
+    rows = ws.iter_rows(values_only=True)
+    header = _clean_columns(next(rows, ()))
+    total = max((ws.max_row or 1) - 1, 1)
+    buffer, seen = [], 0
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == chunk_rows:
+            seen += len(buffer)
+            yield pd.DataFrame(buffer, columns=header), min(seen / total, 1.0)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=header), 1.0
+    wb.close()
+
+
+def _csv_chunks(file, chunk_rows):
+    # Blank lines are kept as empty rows so row numbers match the file's lines
+    size = getattr(file, "size", None) or 0
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, dtype=str, skip_blank_lines=False):
+        chunk.columns = _clean_columns(chunk.columns)
+        yield chunk, min(file.tell() / size, 1.0) if size else 0.0
+
+
+def read_chunks(file, chunk_rows=CHUNK_ROWS):
+    file.seek(0)
+    if _is_excel(file):
+        return _excel_chunks(file, chunk_rows)
+    return _csv_chunks(file, chunk_rows)
+
+
+def normalize_chunk(chunk, first_row, seen):
+    # first_row: spreadsheet row number of the chunk's first line (header is row 1)
+    # seen: {casefolded name: row number} carried across chunks for duplicate checks
+    rows = pd.RangeIndex(first_row, first_row + len(chunk))
+    chunk = chunk.set_axis(rows)
+    row_no = pd.Series(rows, index=rows)
+
+    names = chunk["name"].astype("string").str.strip().str.replace(r"\s+", " ", regex=True)
+    if "gender" in chunk.columns:
+        gender = chunk["gender"].astype("string").str.strip().str.lower().map(GENDERS)
+    else:
+        gender = pd.Series(None, index=rows, dtype="object")
+    gender = gender.fillna("Not Specified")
+
+    # A name is a duplicate if an earlier chunk or an earlier row of this chunk had it
+    key = names.str.casefold()
+    first = key.map(seen).fillna(row_no.groupby(key).transform("min"))
+    missing = names.isna() | (names == "")
+    blank = chunk.astype("string").apply(lambda col: col.str.strip()).replace("", pd.NA).isna().all(axis=1)
+    duplicate = ~missing & (first != row_no)
+    bad = missing | duplicate
+
+    rejected = pd.DataFrame({
+        "row": row_no[bad],
+        "name": names[bad].fillna(""),
+        "reason": "Duplicate of row " + first[bad].astype("Int64").astype("string"),
+    })
+    rejected.loc[missing[bad], "reason"] = "Missing name"
+    rejected.loc[blank[bad], "reason"] = "Blank row"
+
+    seen.update(zip(key[~bad], row_no[~bad]))
+    good = pd.DataFrame({"row": row_no[~bad], "full_name": names[~bad], "gender": gender[~bad]})
+    return good, rejected
+
+
+def import_students(conn, file, class_id, on_progress=None, chunk_rows=CHUNK_ROWS):
+    seen = {}
+    imported = 0
+    rejected = []
+    next_row = 2
+    for chunk, fraction in read_chunks(file, chunk_rows):
+        if "name" not in chunk.columns:
+            raise ValueError("Column 'name' not found.")
+        good, bad = normalize_chunk(chunk, next_row, seen)
+        next_row += len(chunk)
+        rejected.append(bad)
+
+        for start in range(0, len(good), BATCH_SIZE):
+            batch = good.iloc[start:start + BATCH_SIZE]
+            records = [
+                {"full_name": name, "class_id": class_id, "gender": gender}
+                for name, gender in zip(batch["full_name"], batch["gender"])
+            ]
+            try:
+                conn.table("students").upsert(records, on_conflict="full_name, class_id").execute()
+                imported += len(records)
+            except Exception as e:
+                rejected.append(pd.DataFrame({"row": batch["row"], "name": batch["full_name"], "reason": f"Upload failed: {e}"}))
+        if on_progress:
+            on_progress(imported, fraction)
+
+    report = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame(columns=["row", "name", "reason"])
+    return imported, report.sort_values("row").reset_index(drop=True)
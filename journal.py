@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from postgrest.exceptions import APIError
+import cache
+
+# --- OFFLINE WRITE-AHEAD JOURNAL ---
+# "Finalize Attendance" and "Finalize & Save Scores" write to a local SQLite
+# file first and return straight away; a background thread then pushes the
+# rows to Supabase, retrying with exponential backoff when the network is
+# down. Rows are keyed on the same conflict key as the upsert, so saving the
+# same (student, date) or (student, category, recorded_at) again before it
+# syncs just replaces the pending row. The file survives restarts and whatever
+# is left in it is sent the next time the app starts.
+#
+# A batch the server rejects is split in halves until the offending rows are
+# alone, so one bad row never holds back the rest. Rows rejected for good
+# (constraint or data errors, e.g. a student deleted with saves still
+# pending) are set aside as "dead" instead of being retried forever; the
+# sidebar lists them so they can be discarded.
+
+JOURNAL_PATH = os.environ.get("TRACKERAP_JOURNAL", ".journal.sqlite3")
+BATCH_SIZE = 500
+MAX_BACKOFF = 300
+
+CONFLICT_KEYS = {
+    "attendance": ["student_id", "date"],
+    "scores": ["student_id", "category", "recorded_at"],
+}
+
+_wake = threading.Event()
+_state = {"conn": None, "thread": None}
+_start_lock = threading.Lock()
+
+
+def _db():
+    db = sqlite3.connect(JOURNAL_PATH, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS pending (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            record TEXT NOT NULL,
+            class_id TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_try REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            dead INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (table_name, row_key)
+        )
+    """)
+    # Journals written before dead-lettering existed lack the column
+    if "dead" not in {r[1] for r in db.execute("PRAGMA table_info(pending)")}:
+        db.execute("ALTER TABLE pending ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+    return db
+
+
+def _key(table, record):
+    return json.dumps([str(record[c]) for c in CONFLICT_KEYS[table]])
+
+
+def submit(table, records, class_id=None):
+    # Durable as soon as this returns; the flusher is nudged to send it now
+    rows = [(table, _key(table, r), json.dumps(r, default=str), class_id) for r in records]
+    db = _db()
+    with db:
+        # REPLACE gives the row a fresh seq, which tells an in-flight flush
+        # that a newer value arrived and must not be deleted
+        db.executemany(
+            "INSERT OR REPLACE INTO pending (table_name, row_key, record, class_id) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    db.close()
+    _wake.set()
+    return len(rows)
+
+
+def pending_records(table):
+    db = _db()
+    rows = db.execute("SELECT record FROM pending WHERE table_name = ? AND NOT dead", (table,)).fetchall()
+    db.close()
+    return [json.loads(r[0]) for r in rows]
+
+
+def status():
+    db = _db()
+    pending, failing, last_error, dead = db.execute(
+        "SELECT SUM(NOT dead), SUM(NOT dead AND attempts > 0), "
+        "MAX(CASE WHEN NOT dead AND attempts > 0 THEN last_error END), SUM(dead) FROM pending"
+    ).fetchone()
+    db.close()
+    return {"pending": pending or 0, "failing": failing or 0, "last_error": last_error, "dead": dead or 0}
+
+
+def dead_records():
+    # Rows the server refused for good: [{"seq", "table", "record", "error"}]
+    db = _db()
+    rows = db.execute(
+        "SELECT seq, table_name, record, last_error FROM pending WHERE dead ORDER BY seq"
+    ).fetchall()
+    db.close()
+    return [{"seq": r[0], "table": r[1], "record": json.loads(r[2]), "error": r[3]} for r in rows]
+
+
+def discard_dead():
+    db = _db()
+    with db:
+        removed = db.execute("DELETE FROM pending WHERE dead").rowcount
+    db.close()
+    return removed
+
+
+def forget_students(student_ids=(), class_id=None):
+    # Drops unsent saves of deleted students (or of a deleted class), which
+    # could only ever fail on the missing student
+    db = _db()
+    with db:
+        removed = db.executemany(
+            "DELETE FROM pending WHERE json_extract(record, '$.student_id') = ?",
+            [(str(i),) for i in student_ids],
+        ).rowcount
+        if class_id is not None:
+            removed += db.execute("DELETE FROM pending WHERE class_id = ?", (str(class_id),)).rowcount
+    db.close()
+    return removed
+
+
+def _permanent(error):
+    # Errors resending cannot fix: Postgres data (22), constraint (23) and
+    # schema (42) errors, and PostgREST request/schema errors (PGRST1xx/2xx).
+    # Anything else (network, timeouts, auth, 5xx) is retried.
+    code = str(getattr(error, "code", "") or "") if isinstance(error, APIError) else ""
+    return code[:2] in ("22", "23", "42") or code.startswith(("PGRST1", "PGRST2"))
+
+
+def _send(conn, table, on_conflict, rows):
+    # Upserts rows (seq, ..., record) and bisects on a permanent error.
+    # Returns (sent, retry, dead) with retry/dead as [(row, error)].
+    try:
+        conn.table(table).upsert([json.loads(r[2]) for r in rows], on_conflict=on_conflict).execute()
+        return rows, [], []
+    except Exception as e:
+        if not _permanent(e):
+            return [], [(r, e) for r in rows], []
+        if len(rows) == 1:
+            return [], [], [(rows[0], e)]
+        half = len(rows) // 2
+        first = _send(conn, table, on_conflict, rows[:half])
+        second = _send(conn, table, on_conflict, rows[half:])
+        return first[0] + second[0], first[1] + second[1], first[2] + second[2]
+
+
+def flush_once(conn):
+    # Sends everything that is due; returns how many rows were synced
+    db = _db()
+    now = time.time()
+    synced = 0
+    for table, on_conflict in ((t, ", ".join(k)) for t, k in CONFLICT_KEYS.items()):
+        due = db.execute(
+            "SELECT seq, row_key, record, class_id, attempts FROM pending "
+            "WHERE table_name = ? AND NOT dead AND next_try <= ? ORDER BY seq LIMIT ?",
+            (table, now, BATCH_SIZE),
+        ).fetchall()
+        if not due:
+            continue
+        sent, retry, dead = _send(conn, table, on_conflict, due)
+        with db:
+            db.executemany(
+                "UPDATE pending SET attempts = attempts + 1, next_try = ?, last_error = ? WHERE seq = ?",
+                [(now + min(2 ** (r[4] + 1), MAX_BACKOFF), str(e)[:500], r[0]) for r, e in retry],
+            )
+            db.executemany(
+                "UPDATE pending SET attempts = attempts + 1, dead = 1, last_error = ? WHERE seq = ?",
+                [(str(e)[:500], r[0]) for r, e in dead],
+            )
+            db.executemany("DELETE FROM pending WHERE seq = ?", [(r[0],) for r in sent])
+        synced += len(sent)
+        for class_id in {r[3] for r in sent}:
+            cache.invalidate(table, class_id)
+    db.close()
+    return synced
+
+
+def _next_due():
+    db = _db()
+    row = db.execute("SELECT MIN(next_try) FROM pending WHERE NOT dead").fetchone()
+    db.close()
+    return row[0]
+
+
+def _run():
+    while True:
+        try:
+            flush_once(_state["conn"])
+        except Exception:
+            pass  # the journal itself is intact; try again on the next tick
+        due = _next_due()
+        wait = 60 if due is None else min(max(due - time.time(), 0.5), 60)
+        _wake.wait(wait)
+        _wake.clear()
+
+
+def start(conn):
+    # Safe to call on every rerun; only the first call starts the thread
+    with _start_lock:
+        _state["conn"] = conn
+        if _state["thread"] is None or not _state["thread"].is_alive():
+            _state["thread"] = threading.Thread(target=_run, name="journal-flusher", daemon=True)
+            _state["thread"].start()
+    _wake.set()
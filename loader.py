@@ -0,0 +1,84 @@
+import pandas as pd
+
+# --- PAGINATED TABLE LOADER ---
+# A bare .select().execute() is silently cut off at PostgREST's max-rows
+# setting (1000 on Supabase by default), so anything that needs a whole
+# table goes through fetch_frame(). It walks the table page by page, turns
+# each page into a small DataFrame straight away and drops the raw dicts, so
+# at most one page of JSON is held in memory at any time.
+
+PAGE_SIZE = 1000
+
+
+def _apply_filters(query, filters):
+    # filters: [("eq", "class_id", cid), ("in", "student_id", ids), ("gte", "date", d), ...]
+    for op, column, value in filters:
+        query = getattr(query, "in_" if op == "in" else op)(column, value)
+    return query
+
+
+def _columns(columns, key):
+    if columns == "*" or key is None:
+        return columns, False
+    cols = [c.strip() for c in columns.split(",")]
+    if key in cols:
+        return columns, False
+    return ", ".join(cols + [key]), True
+
+
+# Yields (rows, total) per page. With a key we use keyset pagination
+# (key > last seen, ordered by key), which stays fast deep into big tables.
+# With key=None we fall back to offset ranges ordered by `order`, for tables
+# without a unique column.
+def iter_pages(conn, table, columns="*", filters=(), key="id", order=None, page_size=PAGE_SIZE):
+    last = None
+    offset = 0
+    total = None
+    while True:
+        query = conn.table(table).select(columns, count="exact" if total is None else None)
+        query = _apply_filters(query, filters)
+        if key is not None:
+            if last is not None:
+                query = query.gt(key, last)
+            query = query.order(key).limit(page_size)
+        else:
+            for col in order or []:
+                query = query.order(col)
+            query = query.range(offset, offset + page_size - 1)
+
+        res = query.execute()
+        if total is None:
+            total = res.count if res.count is not None else 0
+        rows = res.data or []
+        if not rows:
+            return
+        offset += len(rows)
+        if key is not None:
+            last = rows[-1][key]
+        yield rows, max(total, offset)
+        # The server may cap pages below page_size, so only stop once we
+        # have everything the first count promised
+        if offset >= total:
+            return
+
+
+def fetch_frame(conn, table, columns="*", filters=(), key="id", order=None,
+                page_size=PAGE_SIZE, on_progress=None):
+    query_columns, drop_key = _columns(columns, key)
+    chunks = []
+    loaded = 0
+    for rows, total in iter_pages(conn, table, query_columns, filters, key, order, page_size):
+        chunks.append(pd.DataFrame(rows))
+        loaded += len(rows)
+        if on_progress:
+            on_progress(loaded, total)
+
+    if not chunks:
+        if columns == "*":
+            return pd.DataFrame()
+        return pd.DataFrame(columns=[c.strip() for c in columns.split(",")])
+
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    if drop_key:
+        df = df.drop(columns=[key])
+    return df
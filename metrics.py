@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# --- STUDENT METRICS ---
+# One place that decides what "at risk" and "standing" mean, so the Dashboard
+# red-flag count, the At-Risk tab, Semester Outcomes and the Student Profile
+# always agree. Everything works on whole columns at once (np.select), so
+# classifying tens of thousands of students is a handful of array ops.
+# Thresholds can be overridden from the [thresholds] section of secrets.toml.
+
+DEFAULT_THRESHOLDS = {
+    "attendance_warning": 60.0,  # attendance % below this needs a follow-up
+    "grade_risk": 50.0,          # average grade % below this is academic risk
+    "grade_excellence": 75.0,    # average grade % at or above this is high achieving
+    "absence_streak": 3,         # this many consecutive absences is chronic
+    "absence_window_days": 30,   # ... as is missing absence_window_pct % of the last N school days
+    "absence_window_pct": 20.0,
+}
+
+URGENT = "🚨 Urgent Intervention"
+ACADEMIC_RISK = "⚠️ Academic Risk"
+ATTENDANCE_WARNING = "🟡 Attendance Warning"
+ON_TRACK = "✅ On Track"
+
+HIGH_ACHIEVER = "High Achiever"
+PROGRESSING = "Progressing"
+SUPPORT_NEEDED = "⚠️ Support Needed"
+STANDINGS = [SUPPORT_NEEDED, PROGRESSING, HIGH_ACHIEVER]
+
+
+def thresholds(overrides=None):
+    merged = dict(DEFAULT_THRESHOLDS)
+    for name, value in (overrides or {}).items():
+        if name in merged:
+            merged[name] = float(value)
+    return merged
+
+
+def student_rates(df_att, df_scores):
+    # Per-student attendance % (is_present) and grade % (pct) from raw rows
+    att = pd.Series(dtype=float, name="is_present")
+    grades = pd.Series(dtype=float, name="pct")
+    if not df_att.empty:
+        att = df_att["is_present"].astype(float).groupby(df_att["student_id"]).mean().mul(100).rename("is_present")
+    if not df_scores.empty:
+        pct = df_scores["score_value"].astype(float) / df_scores["max_score"].astype(float) * 100
+        grades = pct.groupby(df_scores["student_id"]).mean().rename("pct")
+    return pd.concat([att, grades], axis=1).rename_axis("student_id").reset_index()
+
+
+def risk_status(attendance, grade, limits=DEFAULT_THRESHOLDS):
+    attendance = np.asarray(attendance, dtype=float)
+    grade = np.asarray(grade, dtype=float)
+    low_att = attendance < limits["attendance_warning"]
+    low_grade = grade < limits["grade_risk"]
+    return np.select(
+        [low_att & low_grade, low_grade, low_att],
+        [URGENT, ACADEMIC_RISK, ATTENDANCE_WARNING],
+        default=ON_TRACK,
+    )
+
+
+def standing(grade, limits=DEFAULT_THRESHOLDS):
+    grade = np.asarray(grade, dtype=float)
+    return np.select(
+        [grade >= limits["grade_excellence"], grade >= limits["grade_risk"]],
+        [HIGH_ACHIEVER, PROGRESSING],
+        default=SUPPORT_NEEDED,
+    )
+
+
+def classify(students, limits=DEFAULT_THRESHOLDS):
+    # students: one row per student with is_present and pct columns
+    return students.assign(
+        Status=risk_status(students["is_present"], students["pct"], limits),
+        Standing=standing(students["pct"], limits),
+    )
+
+
+def standing_counts(grades, limits=DEFAULT_THRESHOLDS):
+    counts = pd.Series(standing(grades, limits)).value_counts()
+    return counts.reindex(STANDINGS, fill_value=0)
@@ -0,0 +1,169 @@
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+
+# --- PER-RERUN INSTRUMENTATION ---
+# Each Streamlit rerun gets a Recorder. The app talks to Supabase through
+# instrument(conn, recorder), which times every .execute() and notes the
+# table, the filters that were chained on, the row count and the JSON payload
+# size. Pandas work and chart drawing are timed with recorder.span(). The
+# sidebar panel shows the result, and TRACKERAP_PERF_LOG appends it as JSON
+# lines (one line per event) for offline analysis.
+
+LOG_PATH = os.environ.get("TRACKERAP_PERF_LOG")
+
+# Builder calls worth keeping in the log; everything else is passed through silently
+STEPS = {
+    "select", "insert", "upsert", "update", "delete",
+    "eq", "neq", "gt", "gte", "lt", "lte", "in_", "ilike", "like", "is_",
+    "order", "range", "limit",
+}
+
+
+class Recorder:
+    def __init__(self, session=None, page=None):
+        self.session = session
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.finished = None
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, kind, name, ms, **details):
+        event = {
+            "kind": kind,
+            "name": name,
+            "ms": round(ms, 2),
+            "at_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            **details,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, kind, name):
+        # kind: "pandas" for transforms, "render" for charts/tables
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(kind, name, (time.perf_counter() - start) * 1000)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        return (self.finished - self.started) * 1000
+
+    def total_ms(self):
+        end = self.finished or time.perf_counter()
+        return (end - self.started) * 1000
+
+    def queries(self):
+        return [e for e in self.events if e["kind"] == "query"]
+
+    def summary(self):
+        queries = self.queries()
+        return {
+            "total_ms": round(self.total_ms(), 2),
+            "queries": len(queries),
+            "query_ms": round(sum(e["ms"] for e in queries), 2),
+            "rows": sum(e.get("rows", 0) for e in queries),
+            "bytes": sum(e.get("bytes", 0) for e in queries),
+            "pandas_ms": round(sum(e["ms"] for e in self.events if e["kind"] == "pandas"), 2),
+            "render_ms": round(sum(e["ms"] for e in self.events if e["kind"] == "render"), 2),
+        }
+
+    def write_jsonl(self, path):
+        stamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        head = {"ts": stamp, "run_id": self.run_id, "session": self.session, "page": self.page}
+        lines = [json.dumps({**head, "kind": "rerun", **self.summary()}, default=str)]
+        lines += [json.dumps({**head, **e}, default=str) for e in self.events]
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _describe(name, args, kwargs):
+    if name == "in_" and len(args) == 2:
+        return f"in_({args[0]}, [{len(list(args[1]))} values])"
+    if name in ("insert", "upsert", "update"):
+        payload = args[0] if args else kwargs.get("json")
+        count = len(payload) if isinstance(payload, list) else 1
+        extra = f", on_conflict={kwargs['on_conflict']}" if kwargs.get("on_conflict") else ""
+        return f"{name}([{count} rows]{extra})"
+    parts = [repr(a) if not isinstance(a, str) else a for a in args]
+    parts += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{name}({', '.join(parts)})"
+
+
+class InstrumentedQuery:
+    def __init__(self, builder, target, recorder, steps=()):
+        self._builder = builder
+        self._target = target
+        self._recorder = recorder
+        self._steps = steps
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            steps = self._steps + ((_describe(name, args, kwargs),) if name in STEPS else ())
+            return InstrumentedQuery(result, self._target, self._recorder, steps)
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        try:
+            res = self._builder.execute()
+        except Exception as e:
+            self._recorder.add("query", self._target, (time.perf_counter() - start) * 1000,
+                               steps=list(self._steps), rows=0, bytes=0, error=str(e))
+            raise
+        ms = (time.perf_counter() - start) * 1000
+        data = getattr(res, "data", None)
+        rows = len(data) if isinstance(data, list) else int(data is not None)
+        payload = len(json.dumps(data, default=str)) if data is not None else 0
+        self._recorder.add("query", self._target, ms, steps=list(self._steps), rows=rows, bytes=payload)
+        return res
+
+
+class InstrumentedClient:
+    def __init__(self, client, recorder):
+        self._client = client
+        self._recorder = recorder
+
+    def table(self, name):
+        return InstrumentedQuery(self._client.table(name), name, self._recorder)
+
+    def rpc(self, name, params=None, **kwargs):
+        builder = self._client.rpc(name, params or {}, **kwargs)
+        return InstrumentedQuery(builder, f"rpc:{name}", self._recorder)
+
+    def __getattr__(self, name):
+        # storage, auth, ... are passed straight through
+        return getattr(self._client, name)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn, recorder):
+        self._conn = conn
+        self.recorder = recorder
+        self.client = InstrumentedClient(conn.client, recorder)
+
+    def table(self, name):
+        return InstrumentedQuery(self._conn.table(name), name, self.recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument(conn, recorder):
+    return InstrumentedConnection(conn, recorder)
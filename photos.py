@@ -0,0 +1,176 @@
+import concurrent.futures
+import hashlib
+import io
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from storage3.utils import StorageException
+import loader
+
+# --- STUDENT PHOTO PIPELINE ---
+# Uploads are decoded, turned upright from their EXIF orientation and
+# re-encoded into two bounded variants: a square "avatar" for the profile
+# card (twice its 150px display size) and a "full" picture. Each object is
+# named after a hash of its bytes, so a URL never changes content and is
+# served with a year-long cache lifetime instead of a ?v= cache-buster. The
+# content-type is the one we encoded, never the uploaded file's extension.
+# The backfill resizes on its own small pool rather than queries.py's, so a
+# long conversion never takes the threads other sessions' page reads run on.
+# If the students update fails after the uploads (e.g. before
+# sql/006_student_photos.sql adds photo_avatar_url), the new objects are
+# removed again so nothing is left orphaned in the bucket.
+
+BUCKET = "student_photos"
+AVATAR_SIZE = 300
+FULL_SIZE = 1200
+QUALITY = 80
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+CACHE_SECONDS = 365 * 24 * 3600
+BACKFILL_BATCH = 8
+BACKFILL_WORKERS = 2
+BACKFILL_TIMEOUT = 120
+
+# Input formats we accept, by what the file actually is (MPO: phone JPEGs)
+ACCEPTED = {"JPEG", "MPO", "PNG", "WEBP", "GIF", "BMP", "TIFF"}
+
+# Pillow format -> (file extension, content-type); WebP unless this Pillow
+# was built without it
+OUTPUT = ("WEBP", "webp", "image/webp") if features.check("webp") else ("JPEG", "jpg", "image/jpeg")
+
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=BACKFILL_WORKERS, thread_name_prefix="photos")
+
+
+def _open(data):
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"Photo is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+    try:
+        img = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise ValueError("File is not a readable image.") from None
+    except Image.DecompressionBombError:
+        raise ValueError("Photo has too many pixels.") from None
+    if img.format not in ACCEPTED:
+        raise ValueError(f"Unsupported image type: {img.format}.")
+    # Let the JPEG decoder scale down while decoding (much faster for phone photos)
+    img.draft("RGB", (FULL_SIZE, FULL_SIZE))
+    try:
+        img = ImageOps.exif_transpose(img)
+    except OSError:
+        # Truncated or corrupt image data, only found once it is decoded
+        raise ValueError("File is not a readable image.") from None
+    if img.mode in ("RGBA", "LA", "P"):
+        # Transparent areas on white, as the card shows them
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _encode(img):
+    fmt, ext, content_type = OUTPUT
+    out = io.BytesIO()
+    if fmt == "WEBP":
+        img.save(out, fmt, quality=QUALITY, method=6)
+    else:
+        img.save(out, fmt, quality=QUALITY, optimize=True, progressive=True)
+    return out.getvalue(), ext, content_type
+
+
+def variants(data):
+    # {"avatar" | "full": (bytes, extension, content-type)}; raises ValueError
+    # for anything that isn't a usable image. EXIF (GPS etc.) is not copied.
+    img = _open(data)
+    # Faces sit in the upper part of portraits, so crop slightly above centre
+    avatar = ImageOps.fit(img, (AVATAR_SIZE, AVATAR_SIZE), Image.Resampling.LANCZOS, centering=(0.5, 0.4))
+    full = img.copy()
+    full.thumbnail((FULL_SIZE, FULL_SIZE), Image.Resampling.LANCZOS)
+    return {"avatar": _encode(avatar), "full": _encode(full)}
+
+
+def object_path(student_id, variant, data, ext):
+    return f"{student_id}/{variant}-{hashlib.sha256(data).hexdigest()[:16]}.{ext}"
+
+
+def storage_path(url):
+    # Object path inside the bucket for one of its public URLs
+    if not url or f"/{BUCKET}/" not in url:
+        return None
+    return url.split(f"/{BUCKET}/", 1)[1].split("?", 1)[0]
+
+
+def store(conn, student_id, data, old_urls=()):
+    # Uploads both variants and points the student at them. Earlier pipeline
+    # variants of this student are removed; original uploads are left alone.
+    # Raises ValueError (not an image), StorageException or APIError.
+    bucket = conn.client.storage.from_(BUCKET)
+    encoded = variants(data)
+    current = {storage_path(u) for u in old_urls}
+    urls, uploaded = {}, []
+    try:
+        for variant, (body, ext, content_type) in encoded.items():
+            path = object_path(student_id, variant, body, ext)
+            bucket.upload(path=path, file=body, file_options={
+                "upsert": "true", "content-type": content_type, "cache-control": str(CACHE_SECONDS),
+            })
+            uploaded.append(path)
+            urls[variant] = bucket.get_public_url(path)
+
+        conn.table("students").update({
+            "photo_url": urls["full"], "photo_avatar_url": urls["avatar"],
+        }).eq("id", student_id).execute()
+    except Exception:
+        # Objects the student's row already points at (same bytes) stay
+        orphans = [p for p in uploaded if p not in current]
+        if orphans:
+            try:
+                bucket.remove(orphans)
+            except StorageException:
+                pass  # the original error is the one to report
+        raise
+
+    kept = {storage_path(u) for u in urls.values()}
+    stale = [
+        p for p in map(storage_path, old_urls)
+        if p and p.startswith(f"{student_id}/") and p not in kept
+    ]
+    if stale:
+        bucket.remove(stale)
+    return urls
+
+
+def backfill(conn, on_progress=None):
+    # Runs every photo uploaded before this pipeline (photo_url set, no
+    # avatar yet) through it, several at a time. Returns (converted, failures)
+    # with failures as {student_id: reason}.
+    df = loader.fetch_frame(conn, "students", "id, photo_url, photo_avatar_url")
+    if df.empty:
+        return 0, {}
+    todo = df[df["photo_url"].notna() & df["photo_avatar_url"].isna()]
+    bucket = conn.client.storage.from_(BUCKET)
+
+    def convert(student_id, url):
+        try:
+            path = storage_path(url)
+            if path is None:
+                raise ValueError(f"Photo is not in the {BUCKET} bucket.")
+            store(conn, student_id, bucket.download(path))
+        except Exception as e:
+            return str(e)
+        return None
+
+    converted, failures = 0, {}
+    rows = list(todo[["id", "photo_url"]].itertuples(index=False))
+    for start in range(0, len(rows), BACKFILL_BATCH):
+        batch = rows[start:start + BACKFILL_BATCH]
+        futures = {str(r.id): _pool.submit(convert, r.id, r.photo_url) for r in batch}
+        for student_id, future in futures.items():
+            try:
+                error = future.result(timeout=BACKFILL_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                error = f"timed out after {BACKFILL_TIMEOUT}s"
+            if error is None:
+                converted += 1
+            else:
+                failures[student_id] = error
+        if on_progress:
+            on_progress(start + len(batch), len(rows))
+    return converted, failures
@@ -0,0 +1,40 @@
+import concurrent.futures
+import time
+
+# --- PARALLEL QUERY EXECUTOR ---
+# Pages hand over their independent reads as {"name": callable} and get the
+# results back as {"name": result}. They run side by side on a shared thread
+# pool, so a page waits for its slowest query rather than the sum of them.
+# Each query has its own deadline, and a failure is raised as a QueryError
+# naming the query, so the page can say exactly what did not load.
+# Queries run off the script thread, so they must not draw Streamlit elements.
+
+DEFAULT_TIMEOUT = 30
+
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="query")
+
+
+class QueryError(Exception):
+    def __init__(self, name, error):
+        super().__init__(f"{name}: {error}")
+        self.name = name
+        self.error = error
+
+
+def run_parallel(queries, timeout=DEFAULT_TIMEOUT, timeouts=None):
+    # timeouts: optional {"name": seconds} overriding `timeout` per query
+    started = time.monotonic()
+    futures = {name: _pool.submit(fn) for name, fn in queries.items()}
+
+    results = {}
+    for name, future in futures.items():
+        limit = (timeouts or {}).get(name, timeout)
+        remaining = max(started + limit - time.monotonic(), 0)
+        try:
+            results[name] = future.result(timeout=remaining)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise QueryError(name, f"timed out after {limit}s") from None
+        except Exception as e:
+            raise QueryError(name, e) from e
+    return results
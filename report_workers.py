@@ -0,0 +1,61 @@
+import functools
+import json
+import multiprocessing
+import sys
+import threading
+from multiprocessing.connection import Listener
+import reports
+
+# --- REPORT CARD WORKERS ---
+# The process pool behind reports.export_zip(), run as its own program
+# (`python -m report_workers`, started by reports.py; never by hand). Spawned
+# workers re-import the parent's __main__, and in the app that is the page
+# script Streamlit is running, so the pool is kept out of the app's process:
+# here __main__ is this module and the workers only import reports.
+#
+# The authkey arrives on stdin, the listening address goes back on stdout,
+# and each connection is one export: (chunks, term, class_name, limits) in,
+# one list of (file name, html) per chunk out as it finishes, then None (or
+# the exception that stopped it). The app keeps stdin open; when it closes,
+# the app is gone and so are we.
+
+
+def _serve(conn, pool):
+    with conn:
+        try:
+            chunks, term, class_name, limits = conn.recv()
+            render = functools.partial(reports._render_chunk, term=term, class_name=class_name, limits=limits)
+            try:
+                for cards in pool.imap_unordered(render, chunks):
+                    conn.send(cards)
+            except Exception as e:
+                conn.send(e)
+                return
+            conn.send(None)
+        except (EOFError, OSError):
+            pass  # the session stopped listening
+
+
+def _accept(listener, pool):
+    while True:
+        try:
+            conn = listener.accept()
+        except (multiprocessing.AuthenticationError, OSError):
+            continue
+        threading.Thread(target=_serve, args=(conn, pool), daemon=True).start()
+
+
+def main():
+    authkey = bytes.fromhex(sys.stdin.buffer.readline().decode().strip())
+    pool = multiprocessing.get_context("spawn").Pool(reports.WORKERS)
+    listener = Listener(("127.0.0.1", 0), authkey=authkey)
+    print(json.dumps(listener.address), flush=True)
+    threading.Thread(target=_accept, args=(listener, pool), daemon=True).start()
+    # Until the app closes our stdin
+    sys.stdin.buffer.read()
+    pool.terminate()
+    pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import html
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import zipfile
+from multiprocessing.connection import Client
+import numpy as np
+import pandas as pd
+import metrics
+
+# --- REPORT CARD EXPORT ---
+# Term-end export for one class: an HTML report card per student, with the
+# same momentum and category-mastery charts as the Student Profile drawn as
+# inline SVG (print to PDF from the browser), plus a class summary as CSV and
+# XLSX, all in one ZIP. Cards are rendered in a process pool fed with small
+# plain-dict payloads, so a big export neither holds the GIL nor slows down
+# other teachers' sessions while it runs. The pool lives in a helper process
+# of its own (see report_workers.py).
+
+WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+_server = {}
+_server_lock = threading.Lock()
+
+
+def _workers():
+    # (address, authkey) of the report_workers process, started on first use
+    # and again if it has died. Its stdin stays open for as long as we run.
+    with _server_lock:
+        proc = _server.get("proc")
+        if proc is None or proc.poll() is not None:
+            authkey = os.urandom(32)
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "report_workers"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            proc.stdin.write(authkey.hex().encode() + b"\n")
+            proc.stdin.flush()
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError("The report card workers did not start.")
+            _server.update(proc=proc, address=tuple(json.loads(line)), authkey=authkey)
+        return _server["address"], _server["authkey"]
+
+
+def _with_pct(df_scores):
+    return df_scores.assign(pct=df_scores["score_value"] / df_scores["max_score"] * 100)
+
+
+def payloads(roster, df_scores, df_att):
+    # roster: [{"id", "full_name", "gender"}]; frames are the class's rows in
+    # the window. One picklable dict per student, in roster order.
+    df_scores = _with_pct(df_scores).sort_values("recorded_at")
+    scores = {sid: g for sid, g in df_scores.groupby(df_scores["student_id"].astype(str))}
+    present = df_att.groupby(df_att["student_id"].astype(str))["is_present"].agg(["sum", "count"])
+    out = []
+    for s in roster:
+        sid = str(s["id"])
+        g = scores.get(sid)
+        out.append({
+            "id": sid,
+            "full_name": s["full_name"],
+            "gender": s.get("gender") or "",
+            "momentum": [] if g is None else list(zip(g["recorded_at"].astype(str), g["pct"].astype(float))),
+            "mastery": {} if g is None else g.groupby("category", observed=True)["pct"].mean().astype(float).to_dict(),
+            "present": int(present["sum"].get(sid, 0)),
+            "taken": int(present["count"].get(sid, 0)),
+        })
+    return out
+
+
+def _rate(present, taken):
+    return present / taken * 100 if taken else None
+
+
+def class_summary(students, limits):
+    # One row per student: attendance, average, standing and status (the
+    # Dashboard's rules), then the average per category
+    rows = []
+    for s in students:
+        pcts = [p for _, p in s["momentum"]]
+        rows.append({
+            "Student Name": s["full_name"],
+            "Gender": s["gender"],
+            "Attendance %": _rate(s["present"], s["taken"]),
+            "Average %": float(np.mean(pcts)) if pcts else None,
+            "Assessments": len(pcts),
+            **{f"{c} %": v for c, v in s["mastery"].items()},
+        })
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df.insert(5, "Standing", np.where(df["Average %"].notna(), metrics.standing(df["Average %"].fillna(0), limits), ""))
+    graded = df["Attendance %"].notna() & df["Average %"].notna()
+    status = metrics.risk_status(df["Attendance %"].fillna(0), df["Average %"].fillna(0), limits)
+    df.insert(6, "Status", np.where(graded, status, ""))
+    return df.round(1)
+
+
+# --- CARD RENDERING (runs in the worker processes) ---
+W, H, PAD = 360, 180, 28
+
+
+def _momentum_svg(points):
+    # Assessment % in date order over 0 / 50 / 100 gridlines
+    if not points:
+        return "<p class='empty'>No assessment data in this term.</p>"
+    n = len(points)
+    xs = [PAD + (W - 2 * PAD) * (i / (n - 1) if n > 1 else 0.5) for i in range(n)]
+    ys = [H - PAD - (H - 2 * PAD) * min(max(p, 0), 100) / 100 for _, p in points]
+    line = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+    dots = "".join(
+        f"<circle cx='{x:.1f}' cy='{y:.1f}' r='3'><title>{html.escape(d)}: {p:.1f}%</title></circle>"
+        for x, y, (d, p) in zip(xs, ys, points)
+    )
+    grid = "".join(
+        f"<line x1='{PAD}' x2='{W - PAD}' y1='{H - PAD - (H - 2 * PAD) * v / 100:.1f}' y2='{H - PAD - (H - 2 * PAD) * v / 100:.1f}' class='grid'/>"
+        f"<text x='{PAD - 4}' y='{H - PAD - (H - 2 * PAD) * v / 100 + 4:.1f}' text-anchor='end'>{v}</text>"
+        for v in (0, 50, 100)
+    )
+    return (
+        f"<svg viewBox='0 0 {W} {H}' class='chart'>{grid}"
+        f"<polyline points='{line}' class='line'/>{dots}"
+        f"<text x='{PAD}' y='{H - 6}'>{html.escape(points[0][0])}</text>"
+        f"<text x='{W - PAD}' y='{H - 6}' text-anchor='end'>{html.escape(points[-1][0])}</text></svg>"
+    )
+
+
+def _mastery_svg(mastery):
+    # Average % per category as horizontal bars, weakest first
+    if not mastery:
+        return "<p class='empty'>Record scores to view category mastery.</p>"
+    items = sorted(mastery.items(), key=lambda kv: kv[1])
+    row, label_w = 22, 120
+    height = row * len(items) + 10
+    bars = "".join(
+        f"<text x='{label_w - 6}' y='{i * row + 16}' text-anchor='end'>{html.escape(str(c))}</text>"
+        f"<rect x='{label_w}' y='{i * row + 4}' width='{(W - label_w - 40) * min(max(v, 0), 100) / 100:.1f}' height='{row - 8}'/>"
+        f"<text x='{label_w + (W - label_w - 40) * min(max(v, 0), 100) / 100 + 4:.1f}' y='{i * row + 16}'>{v:.0f}%</text>"
+        for i, (c, v) in enumerate(items)
+    )
+    return f"<svg viewBox='0 0 {W} {height}' class='chart'>{bars}</svg>"
+
+
+STYLE = """
+body { font-family: -apple-system, Segoe UI, Roboto, sans-serif; color: #1e293b; margin: 32px; }
+h1 { margin: 0; } .sub { color: #64748b; margin: 4px 0 20px; }
+.metrics { display: flex; gap: 12px; margin-bottom: 20px; }
+.metric { flex: 1; border-bottom: 3px solid #4CAF50; padding: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }
+.metric b { display: block; font-size: 1.4em; }
+.metric span { color: #64748b; font-size: 0.8em; text-transform: uppercase; }
+.charts { display: flex; gap: 24px; } .charts div { flex: 1; }
+.chart { width: 100%; font-size: 10px; fill: #64748b; }
+.chart .line { fill: none; stroke: #4CAF50; stroke-width: 2; } .chart circle { fill: #4CAF50; }
+.chart rect { fill: #4CAF50; } .chart .grid { stroke: #e2e8f0; }
+.empty { color: #94a3b8; }
+@media print { body { margin: 12mm; } }
+"""
+
+
+def render_card(student, term, class_name, limits):
+    rate = _rate(student["present"], student["taken"])
+    pcts = [p for _, p in student["momentum"]]
+    average = float(np.mean(pcts)) if pcts else None
+    standing = str(metrics.standing(average, limits)) if average is not None else "No grades"
+    metric = "<div class='metric'><span>{}</span><b>{}</b></div>".format
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(student["full_name"])} - {html.escape(term)}</title>
+<style>{STYLE}</style></head><body>
+<h1>{html.escape(student["full_name"])}</h1>
+<p class="sub">{html.escape(class_name)} | {html.escape(term)} | REF: #{html.escape(student["id"][:8].upper())}</p>
+<div class="metrics">
+{metric("Term Average", f"{average:.1f}%" if average is not None else "-")}
+{metric("Attendance Rate", f"{rate:.1f}%" if rate is not None else "-")}
+{metric("Days Present", f"{student['present']} / {student['taken']}")}
+{metric("Academic Standing", html.escape(standing))}
+</div>
+<div class="charts">
+<div><h3>Performance Momentum</h3>{_momentum_svg(student["momentum"])}</div>
+<div><h3>Mastery by Category</h3>{_mastery_svg(student["mastery"])}</div>
+</div>
+</body></html>
+"""
+
+
+def card_name(student):
+    safe = re.sub(r"[^\w-]+", "_", student["full_name"]).strip("_")
+    return f"cards/{safe}-{student['id'][:5]}.html"
+
+
+def _render_chunk(students, term, class_name, limits):
+    return [(card_name(s), render_card(s, term, class_name, limits)) for s in students]
+
+
+def export_zip(students, term, class_name, limits, on_progress=None):
+    # ZIP bytes with cards/*.html, class_summary.csv and class_summary.xlsx.
+    # Cards go into the archive as each chunk comes back from the pool.
+    out = io.BytesIO()
+    chunk = max(1, -(-len(students) // (WORKERS * 2)))
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        summary = class_summary(students, limits)
+        archive.writestr("class_summary.csv", summary.to_csv(index=False))
+        xlsx = io.BytesIO()
+        summary.to_excel(xlsx, index=False, sheet_name=re.sub(r"[\[\]:*?/\\]", "-", term)[:31] or "Summary")
+        archive.writestr("class_summary.xlsx", xlsx.getvalue())
+
+        chunks = [students[i:i + chunk] for i in range(0, len(students), chunk)]
+        address, authkey = _workers()
+        done = 0
+        with Client(address, authkey=authkey) as conn:
+            conn.send((chunks, term, class_name, dict(limits)))
+            while True:
+                cards = conn.recv()
+                if cards is None:
+                    break
+                if isinstance(cards, Exception):
+                    raise cards
+                for name, card in cards:
+                    archive.writestr(name, card)
+                    done += 1
+                if on_progress:
+                    on_progress(done, len(students))
+    return out.getvalue()
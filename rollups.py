@@ -0,0 +1,224 @@
+import threading
+import numpy as np
+import pandas as pd
+import schema
+import terms
+
+# --- PER-STUDENT ROLLUPS ---
+# Running totals kept in step with the local snapshot (see snapshot.py):
+#   - per student and month: attendance present / sessions / last seen, and
+#     the sum and count of score percentages per category;
+#   - per class and day: attendance present / sessions, for the daily
+#     series and the recent rate.
+# snapshot.py rebuilds a table's totals when it reads or fully resyncs it,
+# and on every delta sync it takes out what the overwritten rows had
+# contributed before adding the new versions: a corrected mark or a re-saved
+# score moves the totals instead of counting twice. Dashboard and Student
+# Profile numbers then come from students x months and classes x days
+# totals rather than grouping every row on each render. Months only partly
+# inside the selected window are filled in from the raw rows of those days,
+# found through a day-sorted index of the snapshot frame.
+#
+# Attendance rows carry no class, so the class x day totals use the class
+# map last handed to set_classes(); they are recounted when it changes
+# (new or moved students), and rows of students not in it yet count under
+# no class until then.
+
+KEYS = {"attendance": ["student", "month"], "scores": ["student", "month", "category"]}
+SUMS = {"attendance": ["present", "sessions"], "scores": ["pct_sum", "pct_count"]}
+DAILY_KEYS = ["class_id", "day"]
+DAILY_SUMS = ["present", "sessions"]
+
+_lock = threading.Lock()
+_totals = {}
+_frames = {}
+_by_day = {}
+_state = {"daily": None, "classes": pd.Series(dtype="str")}
+
+
+def summarize(table, df, by_month=False):
+    # What these raw rows add to the totals, one row per student (and month,
+    # and category for scores). last_seen is a day number (days since 1970).
+    days = schema.day_numbers(df[terms.DATE_COLUMNS[table]])
+    cols = {"student": df["student_id"].cat.codes.to_numpy(dtype=np.int64)}
+    if by_month:
+        cols["month"] = days.astype("datetime64[M]")
+    if table == "attendance":
+        cols["present"] = df["is_present"].to_numpy(dtype=np.int64)
+        cols["sessions"] = np.ones(len(df), dtype=np.int64)
+    else:
+        cols["category"] = df["category"].astype(str).to_numpy()
+        cols["pct_sum"] = (df["score_value"].astype(float) / df["max_score"].astype(float) * 100).to_numpy()
+        cols["pct_count"] = np.ones(len(df), dtype=np.int64)
+    cols["last_seen"] = days.astype(np.int64)
+    keys = [k for k in KEYS[table] if by_month or k != "month"]
+    agg = {c: "sum" for c in SUMS[table]}
+    agg["last_seen"] = "max"
+    return pd.DataFrame(cols).groupby(keys).agg(agg)
+
+
+def summarize_daily(df_att, classes):
+    # Attendance rows as class x day totals; classes: class id per student
+    # code (a Series), "" for students it doesn't know
+    codes = df_att["student_id"].cat.codes.to_numpy(dtype=np.int64)
+    return pd.DataFrame({
+        "class_id": classes.reindex(codes).fillna("").to_numpy(dtype=object),
+        "day": schema.day_numbers(df_att["date"]),
+        "present": df_att["is_present"].to_numpy(dtype=np.int64),
+        "sessions": np.ones(len(df_att), dtype=np.int64),
+    }).groupby(DAILY_KEYS).sum()
+
+
+def _apply(totals, added, removed, sums):
+    # totals + added - removed on matching keys; keys only in `added` are appended
+    fresh = added.index.difference(totals.index)
+    if len(fresh):
+        blank = pd.DataFrame(0, index=fresh, columns=totals.columns).astype(totals.dtypes)
+        totals = pd.concat([totals, blank]).sort_index()
+    values = {c: totals[c].to_numpy().copy() for c in totals.columns}
+    for delta, sign in ((added, 1), (removed, -1)):
+        pos = totals.index.get_indexer(delta.index)
+        for c in sums:
+            np.add.at(values[c], pos, sign * delta[c].to_numpy())
+    if "last_seen" in values:
+        np.maximum.at(values["last_seen"], totals.index.get_indexer(added.index), added["last_seen"].to_numpy())
+    return pd.DataFrame(values, index=totals.index)
+
+
+def _index_days(table, df):
+    # Caller holds _lock. Row positions of the snapshot frame in date order.
+    days = schema.day_numbers(df[terms.DATE_COLUMNS[table]])
+    order = np.argsort(days, kind="stable")
+    _frames[table] = df
+    _by_day[table] = (days[order], order)
+
+
+def rebuild(table, df):
+    # Totals from scratch for a whole snapshot frame (also the repair path)
+    totals = summarize(table, df, by_month=True)
+    with _lock:
+        _totals[table] = totals
+        _index_days(table, df)
+        if table == "attendance":
+            _state["daily"] = summarize_daily(df, _state["classes"])
+
+
+def update(table, old, new, df):
+    # old: the snapshot rows that the delta rows `new` replace (same upsert
+    # key); df: the snapshot frame after the merge
+    with _lock:
+        totals = _totals.get(table)
+        if totals is None:
+            return
+        added = summarize(table, new, by_month=True)
+        removed = summarize(table, old, by_month=True)
+        _totals[table] = _apply(totals, added, removed, SUMS[table])
+        _index_days(table, df)
+        if table == "attendance":
+            classes = _state["classes"]
+            _state["daily"] = _apply(
+                _state["daily"], summarize_daily(new, classes), summarize_daily(old, classes), DAILY_SUMS,
+            )
+
+
+def set_classes(df_students):
+    # Hands over the current class of every student (a typed students frame);
+    # the class x day totals are recounted only if that changed
+    codes = schema.student_codes(df_students["id"]).to_numpy()
+    classes = pd.Series(df_students["class_id"].astype(str).to_numpy(), index=codes).sort_index()
+    with _lock:
+        if classes.equals(_state["classes"]):
+            return
+        _state["classes"] = classes
+        if "attendance" in _frames:
+            _state["daily"] = summarize_daily(_frames["attendance"], classes)
+
+
+def _split(window):
+    # (first, last) months wholly inside the window, and the day ranges of
+    # the partly covered months at either end
+    start, end = np.datetime64(window[0], "D"), np.datetime64(window[1], "D")
+    first = start.astype("datetime64[M]")
+    if first.astype("datetime64[D]") != start:
+        first += 1
+    last = end.astype("datetime64[M]")
+    if (last + 1).astype("datetime64[D]") - 1 != end:
+        last -= 1
+    if first > last:
+        return None, [(start, end)]
+    edges = []
+    if first.astype("datetime64[D]") > start:
+        edges.append((start, first.astype("datetime64[D]") - 1))
+    if (last + 1).astype("datetime64[D]") <= end:
+        edges.append(((last + 1).astype("datetime64[D]"), end))
+    return (first, last), edges
+
+
+def _edge_rows(table, edges, raw):
+    # Caller holds _lock. Rows dated inside the edge ranges: from `raw` when
+    # given (a small frame, e.g. one student's history), otherwise straight
+    # out of the snapshot frame through its day index.
+    if raw is not None:
+        days = schema.day_numbers(raw[terms.DATE_COLUMNS[table]])
+        inside = np.zeros(len(raw), dtype=bool)
+        for lo, hi in edges:
+            inside |= (days >= lo) & (days <= hi)
+        return raw[inside]
+    days, order = _by_day[table]
+    pos = np.concatenate([
+        order[np.searchsorted(days, lo):np.searchsorted(days, hi, side="right")] for lo, hi in edges
+    ])
+    return _frames[table].iloc[np.sort(pos)]
+
+
+def totals(table, window=None, students=None, raw=None):
+    # Totals per student (and category for scores) over the window, or None
+    # before the snapshot has built them. students: limit to these student
+    # codes. raw: the table's rows for the edge days, if already at hand.
+    with _lock:
+        stored = _totals.get(table)
+        if stored is None:
+            return None
+        if students is not None:
+            stored = stored[stored.index.get_level_values("student").isin(students)]
+        parts = [stored]
+        if window is not None:
+            months, edges = _split(window)
+            if months is None:
+                parts = [stored.iloc[:0]]
+            else:
+                month = stored.index.get_level_values("month")
+                parts = [stored[(month >= months[0]) & (month <= months[1])]]
+            if edges:
+                rows = _edge_rows(table, edges, raw)
+                if students is not None:
+                    rows = rows[rows["student_id"].cat.codes.isin(students).to_numpy()]
+                parts.append(summarize(table, rows, by_month=True))
+    keys = [k for k in KEYS[table] if k != "month"]
+    agg = {c: "sum" for c in SUMS[table]}
+    agg["last_seen"] = "max"
+    return pd.concat(parts).groupby(level=keys).agg(agg)
+
+
+def daily(window=None, class_id=None):
+    # Attendance present / sessions per day (a datetime64[D] index) for one
+    # class or the whole school, or None before the snapshot has built them
+    with _lock:
+        by_class = _state["daily"]
+    if by_class is None:
+        return None
+    if class_id is not None:
+        by_class = by_class[by_class.index.get_level_values("class_id") == str(class_id)]
+    days = by_class.groupby(level="day")[DAILY_SUMS].sum()
+    if window is not None:
+        start, end = np.datetime64(window[0], "D"), np.datetime64(window[1], "D")
+        days = days[(days.index >= start) & (days.index <= end)]
+    return days
+
+
+def clear():
+    with _lock:
+        _totals.clear()
+        _frames.clear()
+        _by_day.clear()
+        _state["daily"] = None
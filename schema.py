@@ -0,0 +1,111 @@
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# --- TYPED FRAME SCHEMA ---
+# Fixed column types for the frames the analytics run on. Rows arrive from
+# Supabase as JSON, so without this every UUID, date and category is a Python
+# string. Here dates become date32, scores float32, is_present bool, the small
+# vocabularies (category, gender, class) categorical, and student UUIDs are
+# replaced by dense int32 codes from one process-wide dictionary. The
+# student_id column stays a Categorical over that dictionary, so filters like
+# df["student_id"] == some_uuid and .isin() keep working on the codes.
+
+DATE = pd.ArrowDtype(pa.date32())
+UPDATED_AT = "datetime64[ns, UTC]"
+
+# Columns the analytics need from each table, with their types.
+# "student" means a code from the shared student dictionary.
+COLUMNS = {
+    "attendance": {
+        "student_id": "student",
+        "date": DATE,
+        "is_present": "bool",
+        "updated_at": UPDATED_AT,
+    },
+    "scores": {
+        "student_id": "student",
+        "category": "category",
+        "score_value": "float32",
+        "max_score": "float32",
+        "recorded_at": DATE,
+        "updated_at": UPDATED_AT,
+    },
+    "students": {
+        "id": "str",
+        "full_name": "str",
+        "class_id": "category",
+        "gender": "category",
+    },
+}
+
+_codes = {}
+_ids = []
+_codes_lock = threading.Lock()
+
+
+def select(table):
+    # Column list for a PostgREST select of the typed columns
+    return ", ".join(COLUMNS[table])
+
+
+def student_codes(values):
+    # Dense int32 code for each student UUID; unseen UUIDs get the next code
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Encode only the distinct values, then broadcast through the codes
+        lookup = np.append(student_codes(pd.Series(values.cat.categories)), -1)
+        return pd.Series(lookup[values.cat.codes.to_numpy()], index=values.index, dtype="int32")
+    keys = values.astype(str).to_numpy()
+    with _codes_lock:
+        for key in pd.unique(keys):
+            if key not in _codes:
+                _codes[key] = len(_ids)
+                _ids.append(key)
+        codes = np.fromiter((_codes[k] for k in keys), dtype="int32", count=len(keys))
+    return pd.Series(codes, index=values.index)
+
+
+def student_ids(codes):
+    # Categorical of UUIDs over the shared dictionary
+    with _codes_lock:
+        categories = pd.Index(list(_ids), dtype="str")
+    return pd.Categorical.from_codes(np.asarray(codes), categories=categories)
+
+
+def day_numbers(col):
+    # date32 column as a datetime64[D] array, straight from the Arrow buffer
+    return pa.array(_cast(col, DATE).array).to_numpy(zero_copy_only=False).astype("datetime64[D]")
+
+
+def _cast(col, kind):
+    if kind == "student":
+        return student_ids(student_codes(col))
+    if kind is DATE:
+        if col.dtype == DATE:
+            return col
+        return pd.to_datetime(col, format="ISO8601").dt.date.astype(DATE)
+    if kind == UPDATED_AT:
+        return pd.to_datetime(col, utc=True, format="ISO8601").astype(UPDATED_AT)
+    if kind == "bool":
+        return col.fillna(False).astype(bool)
+    return col.astype(kind)
+
+
+def typed(table, df):
+    # Cast a frame of raw rows to the table's types; already-typed columns are
+    # cheap to pass through, so this is safe to call again after a merge
+    columns = COLUMNS[table]
+    df = pd.DataFrame(df)
+    out = {}
+    for name, kind in columns.items():
+        col = df[name] if name in df.columns else pd.Series([None] * len(df), index=df.index, dtype="object")
+        out[name] = _cast(col, kind)
+    return pd.DataFrame(out, index=df.index)
+
+
+def clear():
+    # Forget the student dictionary (only safe when no typed frames are kept)
+    with _codes_lock:
+        _codes.clear()
+        _ids.clear()
@@ -0,0 +1,161 @@
+import contextlib
+import datetime
+import json
+import os
+import threading
+import pandas as pd
+import loader
+import rollups
+import schema
+
+# --- LOCAL ANALYTICS SNAPSHOT ---
+# Keeps a Parquet copy of the big history tables on disk. The first run pays
+# for the full download; after that we only ask Supabase for rows whose
+# updated_at moved past our watermark (see sql/002_updated_at.sql) and merge
+# them in on the table's upsert key. If the row count no longer matches the
+# server (deletes, restores, manual edits) we throw the copy away and resync.
+# Frames are kept in the compact types from schema.py, on disk and in memory.
+# The per-student totals in rollups.py follow every change made here.
+
+SNAPSHOT_DIR = os.environ.get("TRACKERAP_SNAPSHOT_DIR", ".snapshot")
+
+# Same keys the app upserts on, so a delta row replaces its older version
+TABLE_KEYS = {
+    "attendance": ["student_id", "date"],
+    "scores": ["student_id", "category", "recorded_at"],
+}
+
+# Re-read a little before the watermark so rows committed by slow
+# transactions (stamped earlier than they became visible) are not missed
+OVERLAP = datetime.timedelta(minutes=5)
+
+_locks = {table: threading.Lock() for table in TABLE_KEYS}
+_frames = {}
+
+
+def _paths(table):
+    return (
+        os.path.join(SNAPSHOT_DIR, f"{table}.parquet"),
+        os.path.join(SNAPSHOT_DIR, f"{table}.json"),
+    )
+
+
+def _read(table):
+    data_path, meta_path = _paths(table)
+    if table in _frames:
+        return _frames[table]
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    _frames[table] = (schema.typed(table, pd.read_parquet(data_path)), meta)
+    rollups.rebuild(table, _frames[table][0])
+    return _frames[table]
+
+
+def _write(table, df, meta):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    data_path, meta_path = _paths(table)
+    # Write to temp files first so a crash never leaves a half-written snapshot
+    df.to_parquet(data_path + ".tmp", index=False)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    _frames[table] = (df, meta)
+
+
+def _watermark(df, fallback=None):
+    if df.empty or "updated_at" not in df.columns:
+        return fallback
+    return df["updated_at"].max().isoformat()
+
+
+def _server_count(conn, table):
+    res = conn.table(table).select("*", count="exact", head=True).execute()
+    return res.count
+
+
+def _fetch(conn, table, filters=(), on_progress=None):
+    # Keyset pages on id: deep pages stay cheap and rows inserted or deleted
+    # mid-sync cannot shift a page boundary (id is dropped again afterwards)
+    df = loader.fetch_frame(
+        conn, table, schema.select(table), filters, key="id", on_progress=on_progress,
+    )
+    return schema.typed(table, df)
+
+
+def _full_sync(conn, table, on_progress=None):
+    df = _fetch(conn, table, on_progress=on_progress)
+    meta = {"watermark": _watermark(df), "rows": len(df)}
+    _write(table, df, meta)
+    rollups.rebuild(table, df)
+    return df
+
+
+def _delta_sync(conn, table, df, meta, on_progress=None):
+    since = pd.Timestamp(meta["watermark"]) - OVERLAP
+    delta = _fetch(conn, table, [("gte", "updated_at", since.isoformat())])
+    keys = TABLE_KEYS[table]
+    if not delta.empty:
+        delta = delta.drop_duplicates(subset=keys, keep="last")
+        # Re-type after concat: the two student_id categoricals may differ in length
+        df = schema.typed(table, pd.concat([df, delta], ignore_index=True))
+        # Older versions of the delta's rows (the overlap re-reads some unchanged)
+        stale = df.duplicated(subset=keys, keep="last")
+        df, replaced = df[~stale].reset_index(drop=True), df[stale]
+
+    # Drift check: deletes never show up in a delta, but they do change the count
+    if len(df) != _server_count(conn, table):
+        return _full_sync(conn, table, on_progress)
+
+    if not delta.empty:
+        _write(table, df, {"watermark": _watermark(df, meta["watermark"]), "rows": len(df)})
+        rollups.update(table, replaced, delta, df)
+    return df
+
+
+def clear():
+    # Forget both the in-memory frames and the files (used by the benchmarks)
+    with contextlib.ExitStack() as stack:
+        for lock in _locks.values():
+            stack.enter_context(lock)
+        _frames.clear()
+        rollups.clear()
+        for table in TABLE_KEYS:
+            for path in _paths(table):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _load(conn, table, on_progress=None):
+    df, meta = _read(table)
+    if df is None or not meta.get("watermark"):
+        return _full_sync(conn, table, on_progress)
+    return _delta_sync(conn, table, df, meta, on_progress)
+
+
+def has_copy(table):
+    # Whether a local copy exists, i.e. load() will only fetch a delta
+    data_path, meta_path = _paths(table)
+    return table in _frames or (os.path.exists(data_path) and os.path.exists(meta_path))
+
+
+def load(conn, table, on_progress=None):
+    with _locks[table]:
+        return _load(conn, table, on_progress)
+
+
+def rebuild_rollups(conn, table, on_progress=None):
+    # Repair path: recount the table's per-student totals from the synced copy
+    with _locks[table]:
+        df = _load(conn, table, on_progress)
+        rollups.rebuild(table, df)
+    return df
+
+
+def load_for_student(conn, table, student_id, on_progress=None):
+    df = load(conn, table, on_progress)
+    if df.empty:
+        return df
+    return df[df["student_id"] == student_id].reset_index(drop=True)
@@ -0,0 +1,68 @@
+-- Dashboard aggregation pushed down to Postgres.
+-- Run once in the Supabase SQL editor. The app calls it through
+-- conn.client.rpc("dashboard_aggregates", ...) and falls back to computing
+-- the same numbers in pandas (analytics.aggregate_frames) if it is missing.
+
+create index if not exists students_class_id_idx on public.students (class_id);
+create index if not exists attendance_student_date_idx on public.attendance (student_id, date);
+create index if not exists scores_student_id_idx on public.scores (student_id);
+
+create or replace function public.dashboard_aggregates(
+    p_class_id uuid default null,
+    p_since date default null
+)
+returns jsonb
+language sql
+stable
+as $$
+with s as (
+    select id, full_name, class_id, gender
+    from public.students
+    where p_class_id is null or class_id = p_class_id
+),
+a as (
+    select att.student_id, att.date, att.is_present::int as present
+    from public.attendance att
+    join s on s.id = att.student_id
+),
+sc as (
+    select sc.student_id, sc.category, s.class_id,
+           sc.score_value / nullif(sc.max_score, 0) * 100 as pct
+    from public.scores sc
+    join s on s.id = sc.student_id
+),
+att_means as (
+    select student_id, avg(present) * 100 as is_present from a group by student_id
+),
+grade_means as (
+    select student_id, avg(pct) as pct from sc group by student_id
+)
+select jsonb_build_object(
+    'total_students', (select count(*) from s),
+    'boys', (select count(*) from s where lower(gender) = 'boy'),
+    'girls', (select count(*) from s where lower(gender) = 'girl'),
+    'recent_rate', (select avg(present) * 100 from a where p_since is null or date >= p_since),
+    'daily', coalesce((
+        select jsonb_agg(jsonb_build_object('date', d.date, 'rate', d.rate) order by d.date)
+        from (select date, avg(present) * 100 as rate from a group by date) d
+    ), '[]'::jsonb),
+    'students', coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'student_id', s.id, 'full_name', s.full_name, 'class_id', s.class_id,
+            'is_present', am.is_present, 'pct', gm.pct
+        ))
+        from s
+        left join att_means am on am.student_id = s.id
+        left join grade_means gm on gm.student_id = s.id
+    ), '[]'::jsonb),
+    'classes', coalesce((
+        select jsonb_agg(jsonb_build_object('name', c.name, 'pct', x.pct))
+        from (select class_id, avg(pct) as pct from sc group by class_id) x
+        join public.classes c on c.id = x.class_id
+    ), '[]'::jsonb),
+    'categories', coalesce((
+        select jsonb_agg(jsonb_build_object('category', x.category, 'pct', x.pct))
+        from (select category, avg(pct) as pct from sc group by category) x
+    ), '[]'::jsonb)
+);
+$$;
@@ -0,0 +1,29 @@
+-- Change tracking for the local analytics snapshot (snapshot.py).
+-- Every insert/update stamps updated_at so clients can ask for
+-- "rows changed since my watermark" instead of the whole table.
+
+alter table public.attendance add column if not exists updated_at timestamptz not null default now();
+alter table public.scores add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists attendance_touch_updated_at on public.attendance;
+create trigger attendance_touch_updated_at
+    before insert or update on public.attendance
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists scores_touch_updated_at on public.scores;
+create trigger scores_touch_updated_at
+    before insert or update on public.scores
+    for each row execute function public.touch_updated_at();
+
+create index if not exists attendance_updated_at_idx on public.attendance (updated_at);
+create index if not exists scores_updated_at_idx on public.scores (updated_at);
@@ -0,0 +1,27 @@
+-- Removes students together with all of their attendance and score history.
+-- A function body runs in a single transaction, so either everything goes or
+-- nothing does. Pass a list of ids, a whole class, or both.
+
+create or replace function public.delete_students(
+    p_student_ids uuid[] default null,
+    p_class_id uuid default null
+)
+returns integer
+language plpgsql
+as $$
+declare
+    v_ids uuid[];
+    v_count integer;
+begin
+    select coalesce(array_agg(id), '{}') into v_ids
+    from public.students
+    where id = any(coalesce(p_student_ids, '{}'))
+       or (p_class_id is not null and class_id = p_class_id);
+
+    delete from public.scores where student_id = any(v_ids);
+    delete from public.attendance where student_id = any(v_ids);
+    delete from public.students where id = any(v_ids);
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
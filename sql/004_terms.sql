@@ -0,0 +1,87 @@
+-- School terms and date-window filtering.
+-- Run once in the Supabase SQL editor. The sidebar lists the rows of
+-- public.terms (calendar quarters are used until there are any), and every
+-- analytics read is limited to the selected term with >= / <= predicates on
+-- attendance.date and scores.recorded_at.
+
+create table if not exists public.terms (
+    id uuid primary key default gen_random_uuid(),
+    name text not null unique,
+    start_date date not null,
+    end_date date not null,
+    check (end_date >= start_date)
+);
+
+-- Range scans on the history tables by date, with the student for the join
+create index if not exists attendance_date_student_idx on public.attendance (date, student_id);
+create index if not exists scores_recorded_at_student_idx on public.scores (recorded_at, student_id);
+
+-- dashboard_aggregates gains the window (p_start / p_end, both inclusive);
+-- the old two-argument version is replaced
+drop function if exists public.dashboard_aggregates(uuid, date);
+
+create or replace function public.dashboard_aggregates(
+    p_class_id uuid default null,
+    p_since date default null,
+    p_start date default null,
+    p_end date default null
+)
+returns jsonb
+language sql
+stable
+as $$
+with s as (
+    select id, full_name, class_id, gender
+    from public.students
+    where p_class_id is null or class_id = p_class_id
+),
+a as (
+    select att.student_id, att.date, att.is_present::int as present
+    from public.attendance att
+    join s on s.id = att.student_id
+    where (p_start is null or att.date >= p_start)
+      and (p_end is null or att.date <= p_end)
+),
+sc as (
+    select sc.student_id, sc.category, s.class_id,
+           sc.score_value / nullif(sc.max_score, 0) * 100 as pct
+    from public.scores sc
+    join s on s.id = sc.student_id
+    where (p_start is null or sc.recorded_at >= p_start)
+      and (p_end is null or sc.recorded_at <= p_end)
+),
+att_means as (
+    select student_id, avg(present) * 100 as is_present from a group by student_id
+),
+grade_means as (
+    select student_id, avg(pct) as pct from sc group by student_id
+)
+select jsonb_build_object(
+    'total_students', (select count(*) from s),
+    'boys', (select count(*) from s where lower(gender) = 'boy'),
+    'girls', (select count(*) from s where lower(gender) = 'girl'),
+    'recent_rate', (select avg(present) * 100 from a where p_since is null or date >= p_since),
+    'daily', coalesce((
+        select jsonb_agg(jsonb_build_object('date', d.date, 'rate', d.rate) order by d.date)
+        from (select date, avg(present) * 100 as rate from a group by date) d
+    ), '[]'::jsonb),
+    'students', coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'student_id', s.id, 'full_name', s.full_name, 'class_id', s.class_id,
+            'is_present', am.is_present, 'pct', gm.pct
+        ))
+        from s
+        left join att_means am on am.student_id = s.id
+        left join grade_means gm on gm.student_id = s.id
+    ), '[]'::jsonb),
+    'classes', coalesce((
+        select jsonb_agg(jsonb_build_object('name', c.name, 'pct', x.pct))
+        from (select class_id, avg(pct) as pct from sc group by class_id) x
+        join public.classes c on c.id = x.class_id
+    ), '[]'::jsonb),
+    'categories', coalesce((
+        select jsonb_agg(jsonb_build_object('category', x.category, 'pct', x.pct))
+        from (select category, avg(pct) as pct from sc group by category) x
+    ), '[]'::jsonb)
+);
+$$;
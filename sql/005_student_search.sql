@@ -0,0 +1,13 @@
+-- Student search for the Student Profile and Manage Records pickers.
+-- Run once in the Supabase SQL editor. The pickers send
+-- full_name ilike '%words%' ordered by full_name with a small limit; a
+-- trigram index serves the ilike without scanning every student, and the
+-- (class_id, full_name) index serves the class-filtered listing.
+
+create extension if not exists pg_trgm;
+
+create index if not exists students_full_name_trgm_idx
+    on public.students using gin (full_name gin_trgm_ops);
+
+create index if not exists students_class_full_name_idx
+    on public.students (class_id, full_name);
@@ -0,0 +1,8 @@
+-- Photo variants made by photos.py. Run once in the Supabase SQL editor.
+-- photo_url now holds the "full" variant (at most 1200px) and
+-- photo_avatar_url the 300px square shown on the profile card. Both point at
+-- content-hash object names in the student_photos bucket, so they can be
+-- cached forever. Rows with a photo_url but no avatar were uploaded before
+-- the pipeline; "Optimize Existing Photos" in First Time Setup converts them.
+
+alter table public.students add column if not exists photo_avatar_url text;
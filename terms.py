@@ -0,0 +1,73 @@
+import datetime
+from postgrest.exceptions import APIError
+
+# --- TERMS AND DATE WINDOWS ---
+# Analytics reads are limited to one window of dates, a (start, end) pair of
+# datetime.date, both ends included. The sidebar offers the terms from the
+# `terms` table (see sql/004_terms.sql) or a custom range. Until any terms
+# are set up, calendar quarters ("2026-Q1", ...) stand in for them.
+
+QUARTERS = ((1, 3), (4, 6), (7, 9), (10, 12))
+
+# The column each history table is windowed on
+DATE_COLUMNS = {"attendance": "date", "scores": "recorded_at"}
+
+
+def _month_end(year, month):
+    if month == 12:
+        return datetime.date(year, 12, 31)
+    return datetime.date(year, month + 1, 1) - datetime.timedelta(days=1)
+
+
+def calendar_terms(today=None, years=2):
+    # This year's and last year's quarters up to today, newest first
+    today = today or datetime.date.today()
+    quarters = []
+    for year in range(today.year - years + 1, today.year + 1):
+        for q, (first, last) in enumerate(QUARTERS, start=1):
+            start = datetime.date(year, first, 1)
+            if start <= today:
+                quarters.append({"name": f"{year}-Q{q}", "start": start, "end": _month_end(year, last)})
+    return quarters[::-1]
+
+
+def _date(value):
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def load(conn, today=None):
+    # Terms newest first; calendar quarters if the table is missing or empty
+    try:
+        rows = conn.table("terms").select("name, start_date, end_date").order("start_date", desc=True).execute().data
+    except APIError:
+        rows = []
+    terms = [{"name": r["name"], "start": _date(r["start_date"]), "end": _date(r["end_date"])} for r in rows or []]
+    return terms or calendar_terms(today)
+
+
+def current(terms, today=None):
+    # The term today falls in, otherwise the most recent one
+    today = today or datetime.date.today()
+    for term in terms:
+        if term["start"] <= today <= term["end"]:
+            return term
+    return terms[0]
+
+
+def filters(window, column):
+    # loader-style predicates limiting `column` to the window
+    start, end = window
+    return [("gte", column, str(start)), ("lte", column, str(end))]
+
+
+def within(df, table, window):
+    # Rows of a typed attendance/scores frame (see schema.py) inside the window
+    if window is None or df.empty:
+        return df
+    return df[df[DATE_COLUMNS[table]].between(*window).to_numpy(dtype=bool, na_value=False)].reset_index(drop=True)
+
+
+def recent_since(window, days, today=None):
+    # Start of the last `days` days of the window (ending today at the latest)
+    today = today or datetime.date.today()
+    return max(min(window[1], today) - datetime.timedelta(days=days), window[0])
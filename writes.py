@@ -0,0 +1,110 @@
+import pandas as pd
+from postgrest.exceptions import APIError
+import journal
+import loader
+
+# --- BATCHED WRITES ---
+# Helpers for the save buttons: work out which rows actually changed and send
+# them in as few requests as possible. Each upsert is a single statement, so a
+# batch either lands completely or not at all.
+
+BATCH_SIZE = 500
+
+
+def changed_rows(original, edited, key, columns):
+    # Vectorized diff of two editor frames on `key`; returns the edited rows
+    # whose `columns` differ from the original (rows new to `edited` count too)
+    before = original.set_index(key)[columns].reindex(edited[key])
+    after = edited.set_index(key)[columns]
+    before_text = before.astype("string").fillna("")
+    after_text = after.astype("string").fillna("")
+    differs = (before_text.to_numpy() != after_text.to_numpy()).any(axis=1)
+    return edited[differs]
+
+
+def _batches(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def upsert_batches(conn, table, rows, on_conflict, undo_rows=None):
+    # undo_rows: records that put back the previous values; if a later batch
+    # fails we re-apply them for the batches already written, then re-raise
+    done = 0
+    try:
+        for batch in _batches(rows):
+            conn.table(table).upsert(batch, on_conflict=on_conflict).execute()
+            done += len(batch)
+    except Exception:
+        if undo_rows and done:
+            for batch in _batches(undo_rows[:done]):
+                conn.table(table).upsert(batch, on_conflict=on_conflict).execute()
+        raise
+    return done
+
+
+def attendance_changes(edited, history, day):
+    # history: {student_id: is_present} already on record for `day`. Returns
+    # the records that are new or flipped, and how many rows were unchanged.
+    ids = edited["ID"].astype(str)
+    known = ids.isin(list(history))
+    previous = ids.map(history).where(known, False).astype(bool)
+    status = edited["Status"].astype(bool)
+    changed = (~known | (previous != status)).to_numpy()
+    records = [
+        {"student_id": sid, "is_present": bool(present), "date": str(day)}
+        for sid, present in zip(edited["ID"][changed], status[changed])
+    ]
+    return records, int((~changed).sum())
+
+
+def save_roster_changes(conn, class_id, original, edited):
+    changes = changed_rows(original, edited, "id", ["full_name", "gender"])
+    if changes.empty:
+        return 0
+
+    # class_id rides along because an upsert is checked as an insert first
+    # and students.class_id is NOT NULL
+    def records(df):
+        return [
+            {"id": r.id, "class_id": class_id, "full_name": r.full_name,
+             "gender": None if pd.isna(r.gender) else r.gender}
+            for r in df.itertuples(index=False)
+        ]
+
+    previous = original.set_index("id").loc[changes["id"]].reset_index()
+    return upsert_batches(
+        conn, "students", records(changes[["id", "full_name", "gender"]]), on_conflict="id",
+        undo_rows=records(previous[["id", "full_name", "gender"]]),
+    )
+
+
+def delete_students(conn, student_ids=(), class_id=None):
+    # One transactional RPC (sql/003_delete_students.sql) for any number of
+    # students or a whole class; returns how many students were removed
+    student_ids = [str(i) for i in student_ids]
+    try:
+        res = conn.client.rpc("delete_students", {
+            "p_student_ids": student_ids,
+            "p_class_id": class_id,
+        }).execute()
+        journal.forget_students(student_ids, class_id)
+        return res.data or 0
+    except APIError as e:
+        # Anything but "function not found" (PGRST202) failed inside the
+        # transaction; the per-table fallback below could stop halfway
+        if e.code != "PGRST202":
+            raise
+
+    # Function not installed yet: same child-first order, one request per table per batch
+    if class_id is not None:
+        roster = loader.fetch_frame(conn, "students", "id", [("eq", "class_id", class_id)])
+        student_ids = list(dict.fromkeys(student_ids + [str(i) for i in roster["id"]]))
+    removed = 0
+    for batch in _batches(student_ids):
+        conn.table("scores").delete().in_("student_id", batch).execute()
+        conn.table("attendance").delete().in_("student_id", batch).execute()
+        removed += len(conn.table("students").delete().in_("id", batch).execute().data or [])
+    # Their unsent saves could only fail on the missing student now
+    journal.forget_students(student_ids, class_id)
+    return removed